@@ -0,0 +1,85 @@
+"""Answer keys for server-side quiz grading.
+
+Every question's options are stored parsed in ``Question.choices`` (a JSON list),
+next to the legacy comma-separated ``options`` string. The answer-key index maps
+question id -> its quiz, choices and normalized correct answer. It is built with one query per
+catalog version and held in memory, so grading a whole quiz costs no queries.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models
+
+def parse_options(options: Optional[str]) -> List[str]:
+    """Split the legacy comma-separated options string."""
+    return [option.strip() for option in (options or "").split(",") if option.strip()]
+
+def normalize(answer: Optional[str]) -> str:
+    return " ".join((answer or "").split()).casefold()
+
+@dataclass(frozen=True)
+class AnswerKey:
+    question_id: int
+    quiz_id: int
+    course_id: int
+    choices: Tuple[str, ...]
+    correct_answer: str
+    normalized_correct: str
+    explanation: Optional[str]
+
+    def is_correct(self, selected: str) -> bool:
+        return normalize(selected) == self.normalized_correct
+
+class AnswerKeyIndex:
+    def __init__(self, keys: Dict[int, AnswerKey], version: int):
+        self.version = version
+        self.keys = keys
+        self.quiz_for_course: Dict[int, int] = {}
+        self.questions_for_quiz: Dict[int, List[int]] = {}
+        for key in sorted(keys.values(), key=lambda k: k.question_id):
+            self.quiz_for_course[key.course_id] = key.quiz_id
+            self.questions_for_quiz.setdefault(key.quiz_id, []).append(key.question_id)
+
+    @classmethod
+    def build(cls, db: Session, version: int) -> "AnswerKeyIndex":
+        rows = db.query(
+            models.Question.id, models.Question.quiz_id, models.Quiz.course_id, models.Question.choices,
+            models.Question.options, models.Question.correct_answer, models.Question.explanation,
+        ).join(models.Quiz, models.Quiz.id == models.Question.quiz_id).all()
+        keys = {}
+        for question_id, quiz_id, course_id, choices, options, correct, explanation in rows:
+            # Rows written before the choices column existed fall back to the legacy string
+            choices = tuple(choices if choices is not None else parse_options(options))
+            keys[question_id] = AnswerKey(
+                question_id=question_id,
+                quiz_id=quiz_id,
+                course_id=course_id,
+                choices=choices,
+                correct_answer=correct,
+                normalized_correct=normalize(correct),
+                explanation=explanation,
+            )
+        return cls(keys, version)
+
+class AnswerKeyCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Optional[AnswerKeyIndex] = None
+
+    def index(self, db: Session, version: int) -> AnswerKeyIndex:
+        index = self._index
+        if index is None or index.version != version:
+            index = AnswerKeyIndex.build(db, version)
+            with self._lock:
+                if self._index is None or self._index.version < version:
+                    self._index = index
+        return index
+
+    def stats(self):
+        index = self._index
+        return {"version": index.version if index else 0, "questions": len(index.keys) if index else 0}
+
+answer_key_cache = AnswerKeyCache()
@@ -1,13 +1,22 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from . import config, instrumentation
+from .cache import TTLCache
 
 SECRET_KEY = "super_secret_cognitive_key_for_development" # In production, use env variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7 # 7 days
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different cost than BCRYPT_ROUNDS are reported as needing an update on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=config.BCRYPT_ROUNDS)
 
 import hashlib
 
@@ -20,6 +29,133 @@ def verify_password(plain_password: str, hashed_password: str):
     plain_password = plain_password[:72]
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a new hash too if the stored one uses outdated settings."""
+    plain_password = plain_password[:72]
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _timed(func, *args):
+    # Module-level so it can be pickled into a process pool
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, size-limited pool instead of the shared request threadpool.
+
+    At most ``workers`` hashes run at once and at most ``max_queue`` more may wait;
+    beyond that calls fail fast with 503 so a login burst cannot starve other routes.
+    """
+
+    def __init__(self, executor: str, workers: int, max_queue: int, timeout: float):
+        self._executor_kind = executor
+        self._workers = workers
+        self._timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.rejected = 0
+        self.in_flight = 0
+        self._timings = {}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                pool_cls = ProcessPoolExecutor if self._executor_kind == "process" else ThreadPoolExecutor
+                self._executor = pool_cls(max_workers=self._workers)
+            return self._executor
+
+    def _record(self, operation: str, wall: float, run: float):
+        with self._lock:
+            t = self._timings.setdefault(operation, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0, "run_seconds": 0.0})
+            t["calls"] += 1
+            t["total_seconds"] += wall
+            t["run_seconds"] += run
+            t["max_seconds"] = max(t["max_seconds"], wall)
+
+    def _busy(self) -> HTTPException:
+        with self._lock:
+            self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    def _start(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise self._busy()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._get_executor().submit(_timed, func, *args)
+        except BaseException:
+            self._done()
+            raise
+        # The slot is held until the job itself finishes (or is cancelled before it starts),
+        # not until the caller stops waiting: a timed-out hash still occupies a worker
+        future.add_done_callback(lambda _: self._done())
+        return future
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _submit(self, operation: str, func, *args):
+        start = time.perf_counter()
+        future = self._start(func, *args)
+        try:
+            result, run = future.result(timeout=self._timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise self._busy()
+        self._record(operation, time.perf_counter() - start, run)
+        return result
+
+    async def _submit_async(self, operation: str, func, *args):
+        start = time.perf_counter()
+        future = self._start(func, *args)
+        try:
+            result, run = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            raise self._busy()
+        self._record(operation, time.perf_counter() - start, run)
+        return result
+
+    def hash(self, password: str) -> str:
+        return self._submit("hash", get_password_hash, password)
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return self._submit("verify", verify_and_update_password, plain_password, hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._submit_async("hash", get_password_hash, password)
+
+    async def verify_and_update_async(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._submit_async("verify", verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rejected": self.rejected,
+                "in_flight": self.in_flight,
+                **{op: dict(t) for op, t in self._timings.items()},
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+password_hasher = PasswordHasher(
+    executor=config.PASSWORD_HASH_EXECUTOR,
+    workers=config.PASSWORD_HASH_WORKERS,
+    max_queue=config.PASSWORD_HASH_MAX_QUEUE,
+    timeout=config.PASSWORD_HASH_TIMEOUT_SECONDS,
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -30,17 +166,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def verify_access_token(token: str = Depends(oauth2_scheme)):
+# Verified token -> subject, kept until the token's own exp so repeat requests skip the HMAC check
+token_cache = TTLCache(maxsize=config.TOKEN_CACHE_MAX_ENTRIES, ttl=0)
+
+async def verify_access_token(token: str = Depends(oauth2_scheme)):
+    # async so the (cached, CPU-only) check runs on the event loop instead of the threadpool
+    email = token_cache.get(token)
+    if email is not None:
+        return email
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with instrumentation.stage("jwt_decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             return None
-        return email
     except JWTError:
         return None
+    exp = payload.get("exp")
+    if exp is not None and exp > time.time():
+        token_cache.put(token, email, ttl=exp - time.time())
+    return email
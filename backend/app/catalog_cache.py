@@ -0,0 +1,127 @@
+"""Cache of serialized course-catalog responses.
+
+The catalog only changes when content is seeded, so the JSON bodies for each course
+list page and for each course are rendered (and compressed, see http_cache) once per
+catalog version and then served from memory. Anything that writes courses, modules, quizzes or questions must call
+``bump_version()`` after committing.
+
+The catalog may also be synced by another process (``python -m app.content_sync``,
+another worker). So every ``CATALOG_VERSION_CHECK_SECONDS`` a background thread
+re-reads the persisted sync state (``content_sync_state``), and bumps the version
+when it changed. Other processes therefore serve the new catalog, answer keys and
+recommendations within that interval.
+"""
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from . import config, models
+from .cache import LRUCache
+from .database import get_read_sessionmaker
+
+class CatalogCache:
+    def __init__(self, max_courses: int, max_lists: int, stamp: Optional[Callable[[], Any]] = None,
+                 check_interval: float = 0.0):
+        """``stamp()`` reads the persisted marker of the last sync; polled every ``check_interval`` seconds."""
+        self._lock = threading.Lock()
+        self._version = 0
+        # List variants (pagination cursor, filters, field set) -> rendered page
+        self._lists = LRUCache(max_lists)
+        self._courses = LRUCache(max_courses)
+        self._stamp = stamp
+        self._check_interval = check_interval
+        self._seen_stamp: Any = None
+        self._next_check = 0.0
+        self._checking = False
+        self.check_failures = 0
+
+    @property
+    def version(self) -> int:
+        if self._stamp is not None and self._check_interval > 0 and time.monotonic() >= self._next_check:
+            with self._lock:
+                if not self._checking and time.monotonic() >= self._next_check:
+                    self._checking = True
+                    threading.Thread(target=self._check_in_background, name="catalog-version", daemon=True).start()
+        return self._version
+
+    def bump_version(self) -> int:
+        with self._lock:
+            return self._bump()
+
+    def _bump(self) -> int:
+        # Caller holds self._lock
+        self._version += 1
+        self._lists.clear()
+        self._courses.clear()
+        return self._version
+
+    def check(self) -> bool:
+        """Re-read the persisted sync state now; bump the version if another process synced.
+
+        Returns True if the version was bumped.
+        """
+        if self._stamp is None:
+            return False
+        stamp = self._stamp()
+        with self._lock:
+            changed = self._seen_stamp is not None and stamp != self._seen_stamp
+            self._seen_stamp = stamp
+            self._next_check = time.monotonic() + self._check_interval
+            if changed:
+                self._bump()
+            return changed
+
+    def _check_in_background(self):
+        try:
+            self.check()
+        except Exception:
+            traceback.print_exc()
+            with self._lock:
+                self.check_failures += 1
+                self._next_check = time.monotonic() + self._check_interval
+        finally:
+            with self._lock:
+                self._checking = False
+
+    # Readers take ``version`` before rendering and pass it back to put_*; a result
+    # rendered while the catalog changed is then dropped instead of cached.
+
+    def get_list(self, key: Hashable) -> Optional[Any]:
+        return self._lists.get((self.version, key))
+
+    def put_list(self, key: Hashable, value: Any, version: int):
+        with self._lock:
+            if self._version == version:
+                self._lists.put((version, key), value)
+
+    def get_course(self, course_id: int) -> Optional[Any]:
+        return self._courses.get((self.version, course_id))
+
+    def put_course(self, course_id: int, payload: Any, version: int):
+        with self._lock:
+            if self._version == version:
+                self._courses.put((version, course_id), payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self._version,
+            "check_failures": self.check_failures,
+            "lists": self._lists.stats(),
+            "courses": self._courses.stats(),
+        }
+
+def _sync_stamp():
+    db = get_read_sessionmaker()()
+    try:
+        return tuple(db.query(models.ContentSyncState.key, models.ContentSyncState.content_hash,
+                              models.ContentSyncState.synced_at).order_by(models.ContentSyncState.key))
+    finally:
+        db.close()
+
+catalog_cache = CatalogCache(
+    max_courses=config.CATALOG_CACHE_MAX_COURSES,
+    max_lists=config.CATALOG_CACHE_MAX_LISTS,
+    stamp=_sync_stamp,
+    check_interval=config.CATALOG_VERSION_CHECK_SECONDS,
+)
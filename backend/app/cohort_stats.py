@@ -0,0 +1,224 @@
+"""Cohort-wide statistics: where a learner stands relative to everyone else.
+
+The per-user running totals in ``profile_aggregates`` already hold everything the
+cohort view needs, so one query streams them out as columns (in batches of
+``COHORT_STATS_BATCH_SIZE`` rows) and NumPy computes percentiles and histograms over
+the whole cohort at once. Users with history but no aggregate row yet (a database
+not migrated since aggregates were added) are scanned from the raw tables instead.
+Counts per cognitive level come from one GROUP BY.
+
+Reads only ever see a precomputed snapshot. A snapshot older than
+``COHORT_STATS_TTL_SECONDS`` is still served while a background thread computes the
+next one, so no request pays for the full scan. Until the first snapshot exists,
+readers wait up to ``COHORT_STATS_WAIT_SECONDS`` for it.
+"""
+import itertools
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import config, models, profile_aggregates
+from .database import get_read_sessionmaker
+
+PERCENTILES = (10, 25, 50, 75, 90, 95)
+# Per-user mean response time, seconds; the last bucket is open-ended
+RESPONSE_TIME_EDGES = (0, 5, 10, 15, 20, 30, 45, 60, 90, 120, np.inf)
+
+@dataclass
+class CohortSnapshot:
+    computed_at: datetime
+    user_count: int
+    # Sorted per-user values, kept for percentile-rank lookups
+    accuracy: np.ndarray
+    response_time: np.ndarray
+    behavioral: np.ndarray
+    response_time_histogram: List[int]
+    level_counts: Dict[str, int] = field(default_factory=dict)
+    duration_seconds: float = 0.0
+
+def _percentiles(values: np.ndarray) -> Dict[str, Optional[float]]:
+    if values.size == 0:
+        return {f"p{p}": None for p in PERCENTILES}
+    points = np.percentile(values, PERCENTILES)
+    return {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, points)}
+
+def _describe(values: np.ndarray) -> Dict[str, object]:
+    return {
+        "count": int(values.size),
+        "mean": round(float(values.mean()), 2) if values.size else None,
+        "min": round(float(values[0]), 2) if values.size else None,
+        "max": round(float(values[-1]), 2) if values.size else None,
+        "percentiles": _percentiles(values),
+    }
+
+def percentile_rank(sorted_values: np.ndarray, value: float) -> Optional[float]:
+    """Percentage of the cohort below ``value``, counting ties as half."""
+    if sorted_values.size == 0:
+        return None
+    below = np.searchsorted(sorted_values, value, side="left")
+    at_or_below = np.searchsorted(sorted_values, value, side="right")
+    return round(float((below + at_or_below) / 2 / sorted_values.size * 100), 2)
+
+COLUMNS = ("behavioral_count", "behavioral_weight_sum", "technical_count", "correct_count", "response_time_sum")
+
+def _users_without_aggregate(db: Session, batch_size: int):
+    """Yield, in batches, the ids of users with no ProfileAggregate row."""
+    query = (
+        select(models.User.id)
+        .outerjoin(models.ProfileAggregate, models.ProfileAggregate.user_id == models.User.id)
+        .where(models.ProfileAggregate.user_id.is_(None))
+        .execution_options(yield_per=batch_size)
+    )
+    for batch in db.execute(query).partitions():
+        yield [user_id for user_id, in batch]
+
+def _scanned_rows(db: Session, batch_size: int):
+    # scan_aggregates skips users without any responses, attempts or rollups
+    for user_ids in _users_without_aggregate(db, batch_size):
+        scanned = profile_aggregates.scan_aggregates(db, user_ids)
+        if scanned:
+            yield [tuple(values[column] for column in COLUMNS) for values in scanned.values()]
+
+def compute_snapshot(db: Session, batch_size: int = 5000) -> CohortSnapshot:
+    start = time.perf_counter()
+    query = select(
+        *(getattr(models.ProfileAggregate, column) for column in COLUMNS)
+    ).execution_options(yield_per=batch_size)
+
+    accuracy_parts, time_parts, behavioral_parts = [], [], []
+    histogram = np.zeros(len(RESPONSE_TIME_EDGES) - 1, dtype=np.int64)
+    user_count = 0
+    batches = itertools.chain(db.execute(query).partitions(), _scanned_rows(db, batch_size))
+    for batch in batches:
+        cols = np.nan_to_num(np.array(batch, dtype=np.float64).reshape(-1, len(COLUMNS)))
+        b_count, b_weight, t_count, correct, time_sum = cols.T
+        user_count += len(cols)
+
+        has_technical = t_count > 0
+        accuracy_parts.append(correct[has_technical] / t_count[has_technical] * 100)
+        mean_time = time_sum[has_technical] / t_count[has_technical]
+        time_parts.append(mean_time)
+        histogram += np.histogram(mean_time, bins=RESPONSE_TIME_EDGES)[0]
+
+        # Same scale as the profile's behavioral score: mean weight out of 10, as a percentage
+        has_behavioral = b_count > 0
+        behavioral_parts.append(np.minimum(b_weight[has_behavioral] / (b_count[has_behavioral] * 10) * 100, 100))
+
+    def merged(parts):
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0)
+
+    level_counts = dict(
+        db.query(models.CognitiveProfile.cognitive_level, func.count(models.CognitiveProfile.id))
+        .group_by(models.CognitiveProfile.cognitive_level).all()
+    )
+    return CohortSnapshot(
+        computed_at=datetime.utcnow(),
+        user_count=user_count,
+        accuracy=merged(accuracy_parts),
+        response_time=merged(time_parts),
+        behavioral=merged(behavioral_parts),
+        response_time_histogram=histogram.tolist(),
+        level_counts=level_counts,
+        duration_seconds=time.perf_counter() - start,
+    )
+
+def summary(snapshot: CohortSnapshot) -> Dict[str, object]:
+    edges = RESPONSE_TIME_EDGES
+    return {
+        "computed_at": snapshot.computed_at,
+        "user_count": snapshot.user_count,
+        "technical_accuracy": _describe(snapshot.accuracy),
+        "response_time": dict(
+            _describe(snapshot.response_time),
+            histogram=[
+                {"min": edges[i], "max": None if np.isinf(edges[i + 1]) else edges[i + 1], "count": count}
+                for i, count in enumerate(snapshot.response_time_histogram)
+            ],
+        ),
+        "behavioral_score": _describe(snapshot.behavioral),
+        "cognitive_levels": snapshot.level_counts,
+    }
+
+
+class CohortStatsCache:
+    """Holds the latest snapshot and refreshes it in a background thread once it expires."""
+
+    def __init__(self, compute: Callable[[], CohortSnapshot], ttl: float):
+        self._compute = compute
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._snapshot: Optional[CohortSnapshot] = None
+        self._expires = 0.0
+        self._refreshing = False
+        self.refreshes = 0
+        self.failures = 0
+
+    def get(self, wait: float = 0.0) -> Optional[CohortSnapshot]:
+        """Return the current snapshot, starting a refresh if it has expired.
+
+        Never computes on the caller's thread; waits up to ``wait`` seconds only when
+        no snapshot exists yet.
+        """
+        with self._lock:
+            if time.monotonic() >= self._expires:
+                self._start_refresh()
+            snapshot = self._snapshot
+        if snapshot is None and wait > 0 and self._ready.wait(wait):
+            snapshot = self._snapshot
+        return snapshot
+
+    def refresh_in_background(self):
+        with self._lock:
+            self._start_refresh()
+
+    def _start_refresh(self):
+        # Caller holds self._lock
+        if self._refreshing:
+            return
+        self._refreshing = True
+        threading.Thread(target=self._refresh, name="cohort-stats", daemon=True).start()
+
+    def _refresh(self):
+        try:
+            snapshot = self._compute()
+        except Exception:
+            traceback.print_exc()
+            with self._lock:
+                self.failures += 1
+                self._refreshing = False
+                # Retry on a later read rather than on every one
+                self._expires = time.monotonic() + min(self._ttl, 5.0)
+            return
+        with self._lock:
+            self._snapshot = snapshot
+            self._expires = time.monotonic() + self._ttl
+            self._refreshing = False
+            self.refreshes += 1
+        self._ready.set()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                "users": snapshot.user_count if snapshot else 0,
+                "last_duration_seconds": snapshot.duration_seconds if snapshot else 0.0,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+            }
+
+def _compute_from_db() -> CohortSnapshot:
+    db = get_read_sessionmaker()()
+    try:
+        return compute_snapshot(db, batch_size=config.COHORT_STATS_BATCH_SIZE)
+    finally:
+        db.close()
+
+cohort_cache = CohortStatsCache(_compute_from_db, ttl=config.COHORT_STATS_TTL_SECONDS)
@@ -0,0 +1,130 @@
+"""Runtime settings read from environment variables."""
+import os
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+# Profile recomputation: deferred to a background scheduler that merges bursts per user
+PROFILE_RECOMPUTE_DEFERRED = env_bool("PROFILE_RECOMPUTE_DEFERRED", True)
+PROFILE_RECOMPUTE_WINDOW_SECONDS = env_float("PROFILE_RECOMPUTE_WINDOW_SECONDS", 0.5)
+PROFILE_RECOMPUTE_WORKERS = env_int("PROFILE_RECOMPUTE_WORKERS", 2)
+# Failed recomputes are retried this many times, waiting RETRY_BACKOFF_SECONDS doubled each time
+PROFILE_RECOMPUTE_MAX_RETRIES = env_int("PROFILE_RECOMPUTE_MAX_RETRIES", 3)
+PROFILE_RECOMPUTE_RETRY_BACKOFF_SECONDS = env_float("PROFILE_RECOMPUTE_RETRY_BACKOFF_SECONDS", 1.0)
+
+# Serialized course catalog kept in memory; bounds the number of per-course and list-page entries
+CATALOG_CACHE_MAX_COURSES = env_int("CATALOG_CACHE_MAX_COURSES", 256)
+CATALOG_CACHE_MAX_LISTS = env_int("CATALOG_CACHE_MAX_LISTS", 64)
+# How often each process re-reads the persisted sync state to notice catalog syncs made
+# by other processes (app.content_sync, other workers); 0 disables the check
+CATALOG_VERSION_CHECK_SECONDS = env_float("CATALOG_VERSION_CHECK_SECONDS", 5.0)
+
+# Database engine. Any SQLAlchemy URL is accepted; the default is the local SQLite file.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, '..', 'cognitive_analyzer.db')}")
+# SQLite connection pragmas
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_CACHE_SIZE = env_int("SQLITE_CACHE_SIZE", -20000)  # negative = KiB, so ~20 MB per connection
+SQLITE_MMAP_SIZE = env_int("SQLITE_MMAP_SIZE", 268435456)
+# Connection pool for server databases (PostgreSQL, MySQL, ...)
+DB_POOL_SIZE = env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_RECYCLE = env_int("DB_POOL_RECYCLE", 1800)
+DB_POOL_TIMEOUT = env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+
+# Authentication caches: decoded tokens are kept until their exp, resolved users for a short TTL
+TOKEN_CACHE_MAX_ENTRIES = env_int("TOKEN_CACHE_MAX_ENTRIES", 10000)
+USER_CACHE_MAX_ENTRIES = env_int("USER_CACHE_MAX_ENTRIES", 10000)
+USER_CACHE_TTL_SECONDS = env_float("USER_CACHE_TTL_SECONDS", 60.0)
+
+# Password hashing: bcrypt cost, and the dedicated pool that runs it (thread or process)
+BCRYPT_ROUNDS = env_int("BCRYPT_ROUNDS", 12)
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = env_int("PASSWORD_HASH_WORKERS", 2)
+PASSWORD_HASH_MAX_QUEUE = env_int("PASSWORD_HASH_MAX_QUEUE", 32)
+PASSWORD_HASH_TIMEOUT_SECONDS = env_float("PASSWORD_HASH_TIMEOUT_SECONDS", 10.0)
+
+# Request path: AsyncSession on the event loop (aiosqlite for SQLite), or the sync
+# Session on the threadpool for comparison. ASYNC_DATABASE_URL defaults to DATABASE_URL
+# with the async driver swapped in.
+DB_ASYNC = env_bool("DB_ASYNC", True)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Read-only endpoints: READ_DATABASE_URL points them at a replica (ASYNC_READ_DATABASE_URL
+# for the async driver, defaulting to the swapped driver). Without one, a SQLite file is
+# opened a second time read-only (mode=ro, query_only) unless DB_READ_ROUTING=0, and
+# server databases use the primary.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+ASYNC_READ_DATABASE_URL = os.getenv("ASYNC_READ_DATABASE_URL")
+DB_READ_ROUTING = env_bool("DB_READ_ROUTING", True)
+
+# Instrumentation: per-route timings and SQL counts served at /metrics. DEBUG adds
+# X-Query-Count / X-SQL-Time-Ms response headers; SLOW_REQUEST_MS > 0 logs slower
+# requests together with (up to SLOW_REQUEST_MAX_STATEMENTS of) their statements.
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+DEBUG = env_bool("DEBUG", False)
+SLOW_REQUEST_MS = env_float("SLOW_REQUEST_MS", 0.0)
+SLOW_REQUEST_MAX_STATEMENTS = env_int("SLOW_REQUEST_MAX_STATEMENTS", 50)
+
+# Cohort analytics: snapshot lifetime before a background refresh, rows per fetched
+# batch, and how long a read may wait for the very first snapshot
+COHORT_STATS_TTL_SECONDS = env_float("COHORT_STATS_TTL_SECONDS", 60.0)
+COHORT_STATS_BATCH_SIZE = env_int("COHORT_STATS_BATCH_SIZE", 5000)
+COHORT_STATS_WAIT_SECONDS = env_float("COHORT_STATS_WAIT_SECONDS", 5.0)
+
+# Personalized recommendations: how many courses to return, and the per-user memo of
+# rendered results (also invalidated by profile, catalog and completion changes)
+RECOMMENDATION_LIMIT = env_int("RECOMMENDATION_LIMIT", 5)
+RECOMMENDATION_MIN_RESULTS = env_int("RECOMMENDATION_MIN_RESULTS", 3)
+RECOMMENDATION_CACHE_MAX_USERS = env_int("RECOMMENDATION_CACHE_MAX_USERS", 10000)
+RECOMMENDATION_CACHE_TTL_SECONDS = env_float("RECOMMENDATION_CACHE_TTL_SECONDS", 300.0)
+
+# Serialize read-only ORM responses by copying fields into dicts and encoding with
+# orjson (when installed) instead of re-validating through pydantic
+FAST_JSON = env_bool("FAST_JSON", True)
+
+# Response compression for cached bodies: gzip level, and the size below which bodies
+# are sent uncompressed (brotli is added automatically when the package is installed)
+GZIP_LEVEL = env_int("GZIP_LEVEL", 6)
+COMPRESSION_MIN_BYTES = env_int("COMPRESSION_MIN_BYTES", 1024)
+
+# Group commit for test submissions: rows are queued for a single writer that commits
+# everything received within GROUP_COMMIT_MAX_DELAY_MS (or GROUP_COMMIT_MAX_BATCH_ROWS
+# rows) in one transaction; beyond GROUP_COMMIT_MAX_PENDING_ROWS queued rows, 503
+GROUP_COMMIT = env_bool("GROUP_COMMIT", False)
+GROUP_COMMIT_MAX_DELAY_MS = env_float("GROUP_COMMIT_MAX_DELAY_MS", 5.0)
+GROUP_COMMIT_MAX_BATCH_ROWS = env_int("GROUP_COMMIT_MAX_BATCH_ROWS", 500)
+GROUP_COMMIT_MAX_PENDING_ROWS = env_int("GROUP_COMMIT_MAX_PENDING_ROWS", 5000)
+
+# Raw responses/attempts older than this many whole days are folded into per-user
+# daily rollups by `python -m app.rollups`
+ROLLUP_AFTER_DAYS = env_int("ROLLUP_AFTER_DAYS", 30)
+
+# Admin access (bulk exports): comma-separated emails of admin users
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+# Rows per fetched batch when streaming exports from a server-side cursor
+EXPORT_BATCH_SIZE = env_int("EXPORT_BATCH_SIZE", 1000)
+
+# Startup and the production launcher (python -m app.serve). Migrations and the catalog
+# sync run under STARTUP_LOCK_PATH; the launcher does them once and sets
+# STARTUP_PREPARED=1 for its workers, which then only warm their caches.
+STARTUP_LOCK_PATH = os.getenv("STARTUP_LOCK_PATH", os.path.join(BASE_DIR, "..", ".startup.lock"))
+STARTUP_PREPARED = env_bool("STARTUP_PREPARED", False)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = env_int("SERVER_PORT", 8000)
+SERVER_WORKERS = env_int("WEB_CONCURRENCY", 2)
+SERVER_GRACEFUL_TIMEOUT_SECONDS = env_int("SERVER_GRACEFUL_TIMEOUT_SECONDS", 30)
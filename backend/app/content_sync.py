@@ -0,0 +1,204 @@
+"""Apply the seed catalog definition to the database as an idempotent diff.
+
+The definition is hashed and compared with the hash stored by the previous run, so an
+unchanged catalog costs one SELECT. Otherwise rows are matched by natural key and only
+the differences are written:
+
+    courses    by title
+    modules    by (course, order)
+    quizzes    by course (one per course)
+    questions  by (quiz, text)
+
+Rows that no longer appear in the definition are deleted, and new rows go in with bulk
+INSERTs. Unchanged courses keep their IDs.
+
+Run it standalone with:
+
+    python -m app.content_sync [--force]
+"""
+import argparse
+import hashlib
+import json
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
+
+from . import config, migrations, models
+from .answer_keys import parse_options
+from .catalog_cache import catalog_cache
+from .database import SessionLocal, engine
+from .seed_content import catalog_definition
+
+STATE_KEY = "catalog"
+COURSE_FIELDS = ("description", "difficulty", "instructor", "image_url")
+MODULE_FIELDS = ("title", "content_theoretical", "content_practical", "content_visual", "video_url")
+QUESTION_FIELDS = ("options", "choices", "correct_answer", "explanation")
+
+def content_hash(catalog: List[Dict[str, Any]]) -> str:
+    encoded = json.dumps(catalog, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def _update_fields(row, data: Dict[str, Any], fields) -> bool:
+    changed = False
+    for field in fields:
+        value = data.get(field)
+        if getattr(row, field) != value:
+            setattr(row, field, value)
+            changed = True
+    return changed
+
+def _question_row(q_data: Dict[str, Any], quiz_id: int) -> Dict[str, Any]:
+    # The definition keeps the comma-separated string; choices are derived from it
+    return dict(q_data, quiz_id=quiz_id, choices=q_data.get("choices") or parse_options(q_data.get("options")))
+
+def _apply(db: Session, catalog: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts = {"inserted": 0, "updated": 0, "deleted": 0}
+    existing = db.query(models.Course).options(
+        selectinload(models.Course.modules),
+        selectinload(models.Course.quiz).selectinload(models.Quiz.questions)
+    ).order_by(models.Course.id).all()
+    by_title: Dict[str, models.Course] = {}
+    for course in existing:
+        if course.title in by_title:
+            # Duplicate from an earlier non-idempotent seed
+            db.delete(course)
+            counts["deleted"] += 1
+        else:
+            by_title[course.title] = course
+
+    # Courses first: new ones are flushed together so their IDs are known
+    wanted_titles = {c["title"] for c in catalog}
+    for title, course in list(by_title.items()):
+        if title not in wanted_titles:
+            db.delete(course)
+            del by_title[title]
+            counts["deleted"] += 1
+    new_courses = []
+    for course_data in catalog:
+        course = by_title.get(course_data["title"])
+        if course is None:
+            course = models.Course(title=course_data["title"], **{f: course_data.get(f) for f in COURSE_FIELDS})
+            by_title[course.title] = course
+            new_courses.append(course)
+        elif _update_fields(course, course_data, COURSE_FIELDS):
+            counts["updated"] += 1
+    db.add_all(new_courses)
+    db.flush()
+    counts["inserted"] += len(new_courses)
+    new_course_ids = {c.id for c in new_courses}
+
+    module_rows: List[Dict[str, Any]] = []
+    new_quizzes: List[models.Quiz] = []
+    pending_questions: List[tuple] = []  # (quiz, question data) for new quizzes
+    question_rows: List[Dict[str, Any]] = []
+    for course_data in catalog:
+        course = by_title[course_data["title"]]
+        is_new = course.id in new_course_ids
+
+        # Modules
+        current_modules = {} if is_new else {m.order: m for m in course.modules}
+        wanted_orders = set()
+        for mod_data in course_data.get("modules", []):
+            wanted_orders.add(mod_data["order"])
+            module = current_modules.get(mod_data["order"])
+            if module is None:
+                module_rows.append(dict(mod_data, course_id=course.id))
+            elif _update_fields(module, mod_data, MODULE_FIELDS):
+                counts["updated"] += 1
+        for order, module in current_modules.items():
+            if order not in wanted_orders:
+                db.delete(module)
+                counts["deleted"] += 1
+
+        # Quiz and questions
+        quiz_data = course_data.get("quiz")
+        quiz = None if is_new else course.quiz
+        if quiz_data is None:
+            if quiz is not None:
+                db.delete(quiz)
+                counts["deleted"] += 1
+            continue
+        questions_data = quiz_data.get("questions", [])
+        if quiz is None:
+            quiz = models.Quiz(title=quiz_data["title"], course_id=course.id)
+            new_quizzes.append(quiz)
+            pending_questions.extend((quiz, q_data) for q_data in questions_data)
+            continue
+        if quiz.title != quiz_data["title"]:
+            quiz.title = quiz_data["title"]
+            counts["updated"] += 1
+        current_questions = {q.text: q for q in quiz.questions}
+        wanted_texts = set()
+        for q_data in questions_data:
+            wanted_texts.add(q_data["text"])
+            question = current_questions.get(q_data["text"])
+            if question is None:
+                question_rows.append(_question_row(q_data, quiz.id))
+            elif _update_fields(question, _question_row(q_data, quiz.id), QUESTION_FIELDS):
+                counts["updated"] += 1
+        for text, question in current_questions.items():
+            if text not in wanted_texts:
+                db.delete(question)
+                counts["deleted"] += 1
+
+    db.add_all(new_quizzes)
+    db.flush()
+    counts["inserted"] += len(new_quizzes)
+    question_rows.extend(_question_row(q_data, quiz.id) for quiz, q_data in pending_questions)
+
+    if module_rows:
+        db.execute(insert(models.Module), module_rows)
+        counts["inserted"] += len(module_rows)
+    if question_rows:
+        db.execute(insert(models.Question), question_rows)
+        counts["inserted"] += len(question_rows)
+    return counts
+
+def sync_content(db: Session, catalog: Optional[List[Dict[str, Any]]] = None, force: bool = False) -> bool:
+    """Bring the catalog tables in line with the seed definition.
+
+    Returns True if anything was written.
+    """
+    if catalog is None:
+        catalog = catalog_definition()
+    digest = content_hash(catalog)
+    state = db.query(models.ContentSyncState).filter(models.ContentSyncState.key == STATE_KEY).first()
+    if state is not None and state.content_hash == digest and not force:
+        print("Catalog content unchanged, skipping sync.")
+        return False
+
+    try:
+        counts = _apply(db, catalog)
+        if state is None:
+            state = models.ContentSyncState(key=STATE_KEY)
+            db.add(state)
+        state.content_hash = digest
+        state.synced_at = datetime.utcnow()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    catalog_cache.bump_version()
+    print(f"Catalog synced ({len(catalog)} courses): {counts['inserted']} inserted, "
+          f"{counts['updated']} updated, {counts['deleted']} deleted.")
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync the course catalog tables with the seed definition.")
+    parser.add_argument("--force", action="store_true", help="diff the tables even if the definition hash is unchanged")
+    args = parser.parse_args(argv)
+
+    migrations.upgrade(engine)
+    db = SessionLocal()
+    try:
+        if sync_content(db, force=args.force) and config.CATALOG_VERSION_CHECK_SECONDS > 0:
+            print(f"Running servers pick up the new catalog within {config.CATALOG_VERSION_CHECK_SECONDS:g}s.")
+    finally:
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,116 @@
-from sqlalchemy import create_engine
+import os
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
-import os
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, '..', 'cognitive_analyzer.db')}"
+from . import config
+
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+def is_sqlite(url) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+_SYNCHRONOUS_NAMES = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}
+
+def _sqlite_pragmas():
+    return {
+        "journal_mode": config.SQLITE_JOURNAL_MODE,
+        "synchronous": config.SQLITE_SYNCHRONOUS,
+        "busy_timeout": config.SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": config.SQLITE_CACHE_SIZE,
+        "mmap_size": config.SQLITE_MMAP_SIZE,
+    }
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def _set_sqlite_read_pragmas(dbapi_connection, connection_record):
+    # Read-only connections leave journal mode and sync to the writer; query_only makes
+    # any write through them an error instead of a lock on the database
+    cursor = dbapi_connection.cursor()
+    try:
+        for name in ("busy_timeout", "cache_size", "mmap_size"):
+            cursor.execute(f"PRAGMA {name}={_sqlite_pragmas()[name]}")
+        cursor.execute("PRAGMA query_only=1")
+    finally:
+        cursor.close()
+
+def _sqlite_in_transaction(dbapi_connection) -> bool:
+    # The aiosqlite adapter wraps an aiosqlite connection, which mirrors sqlite3's flag
+    return getattr(dbapi_connection, "_connection", dbapi_connection).in_transaction
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def _begin_before_savepoint(conn, name):
+    # pysqlite (and aiosqlite over it) only emits BEGIN before INSERT/UPDATE/DELETE, never
+    # before SAVEPOINT: a savepoint opened after plain SELECTs ran outside any transaction,
+    # and its RELEASE committed on its own. Open the outer transaction first, taking the
+    # write lock up front: the savepoint is there to write, and under WAL a deferred
+    # transaction that has to upgrade to a writer fails instead of waiting on busy_timeout.
+    if not _sqlite_in_transaction(conn.connection.dbapi_connection):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+def begin_snapshot(db: Session):
+    """Make the rest of ``db``'s transaction read from one snapshot. Call before its first query.
+
+    pysqlite runs SELECTs outside any transaction, so on SQLite this begins one (under WAL
+    it reads a single snapshot until the session ends); server databases get REPEATABLE READ.
+    """
+    if is_sqlite(db.get_bind().url):
+        conn = db.connection()
+        if not _sqlite_in_transaction(conn.connection.dbapi_connection):
+            conn.exec_driver_sql("BEGIN")
+    else:
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+def create_db_engine(url: str, read_only: bool = False) -> Engine:
+    """Build an engine for ``url`` using the settings in ``config``.
+
+    SQLite gets WAL and the other pragmas on every new connection (``read_only``:
+    the cache pragmas and ``query_only``) and a real outer transaction under
+    savepoints; server databases get an explicitly sized connection pool.
+    """
+    if is_sqlite(url):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        event.listen(engine, "connect", _set_sqlite_read_pragmas if read_only else _set_sqlite_pragmas)
+        event.listen(engine, "savepoint", _begin_before_savepoint)
+    else:
+        engine = create_engine(
+            url,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_recycle=config.DB_POOL_RECYCLE,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_pre_ping=config.DB_POOL_PRE_PING,
+        )
+    return engine
+
+def describe_engine(engine: Engine) -> str:
+    """One-line summary of the effective engine settings, read back from the database."""
+    url = repr(engine.url)  # password masked
+    if is_sqlite(engine.url):
+        with engine.connect() as conn:
+            effective = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in _sqlite_pragmas()}
+        effective["synchronous"] = _SYNCHRONOUS_NAMES.get(effective["synchronous"], effective["synchronous"])
+        settings = " ".join(f"{name}={value}" for name, value in effective.items())
+    else:
+        pool = engine.pool
+        settings = (f"pool={type(pool).__name__} size={config.DB_POOL_SIZE} max_overflow={config.DB_MAX_OVERFLOW} "
+                    f"recycle={config.DB_POOL_RECYCLE}s timeout={config.DB_POOL_TIMEOUT}s pre_ping={config.DB_POOL_PRE_PING}")
+    return f"Database engine: {url} {settings}"
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Group-commit writer sessions: rows are handed to other threads after the commit
+GroupCommitSession = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
@@ -19,3 +120,162 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async request path. Route handlers keep their query code as plain functions taking a
+# sync Session and run them with ``await db.run_sync(fn, ...)``: with an AsyncSession the
+# I/O is awaited on the event loop, with ThreadedSession (DB_ASYNC=0) it runs on the
+# threadpool as before. Anything serialized after run_sync returns must already be
+# loaded (selectinload, expire_on_commit=False), since lazy loads cannot run there.
+
+T = TypeVar("T")
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for {backend!r}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def create_async_db_engine(url: str, read_only: bool = False):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if is_sqlite(url):
+        async_engine = create_async_engine(url)
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_read_pragmas if read_only else _set_sqlite_pragmas)
+        event.listen(async_engine.sync_engine, "savepoint", _begin_before_savepoint)
+    else:
+        async_engine = create_async_engine(
+            url,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_recycle=config.DB_POOL_RECYCLE,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_pre_ping=config.DB_POOL_PRE_PING,
+        )
+    return async_engine
+
+class ThreadedSession:
+    """Sync Session exposing AsyncSession's ``run_sync`` by hopping to the threadpool."""
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def run_sync(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        self.sync_session.close()
+
+async_engine = None
+AsyncSessionLocal = None
+
+def _get_async_sessionmaker():
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+        async_engine = create_async_db_engine(config.ASYNC_DATABASE_URL or async_url(SQLALCHEMY_DATABASE_URL))
+        AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    return AsyncSessionLocal
+
+async def get_async_db():
+    """Request session with an async ``run_sync``; see the note above."""
+    if config.DB_ASYNC:
+        db = _get_async_sessionmaker()()
+    else:
+        db = ThreadedSession(SessionLocal(expire_on_commit=False))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+# Read-only endpoints use their own engine and pool (get_read_db / get_async_read_db), so
+# under WAL their reads never queue behind the writer's connections. The engine is
+# READ_DATABASE_URL (a replica) when set; for a SQLite file it is the same file opened
+# with mode=ro and query_only; otherwise it falls back to the primary engine.
+
+def read_url(url: str) -> Optional[str]:
+    if config.READ_DATABASE_URL:
+        return config.READ_DATABASE_URL
+    if not config.DB_READ_ROUTING or not is_sqlite(url):
+        return None
+    parsed = make_url(url)
+    path = parsed.database
+    if not path or path == ":memory:" or path.startswith("file:"):
+        return None
+    return parsed.set(
+        database=Path(os.path.abspath(path)).as_uri(),
+        query=dict(parsed.query, mode="ro", uri="true"),
+    ).render_as_string(hide_password=False)
+
+read_engine = None
+ReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+def get_read_sessionmaker():
+    """Sessionmaker for read-only work; created on first use, once the database file exists."""
+    global read_engine, ReadSessionLocal
+    if ReadSessionLocal is None:
+        url = read_url(SQLALCHEMY_DATABASE_URL)
+        if url is None:
+            ReadSessionLocal = SessionLocal
+        else:
+            read_engine = create_db_engine(url, read_only=True)
+            ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    return ReadSessionLocal
+
+def get_read_engine() -> Engine:
+    get_read_sessionmaker()
+    return read_engine if read_engine is not None else engine
+
+def _get_async_read_sessionmaker():
+    global async_read_engine, AsyncReadSessionLocal
+    if AsyncReadSessionLocal is None:
+        url = config.ASYNC_READ_DATABASE_URL
+        if url is None:
+            sync_url = read_url(SQLALCHEMY_DATABASE_URL)
+            url = async_url(sync_url) if sync_url is not None else None
+        if url is None:
+            AsyncReadSessionLocal = _get_async_sessionmaker()
+        else:
+            from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+            async_read_engine = create_async_db_engine(url, read_only=True)
+            AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False,
+                                                       expire_on_commit=False)
+    return AsyncReadSessionLocal
+
+def get_read_db():
+    db = get_read_sessionmaker()()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    """Like ``get_async_db``, on the read-only engine. Only for handlers that never write."""
+    if config.DB_ASYNC:
+        db = _get_async_read_sessionmaker()()
+    else:
+        db = ThreadedSession(get_read_sessionmaker()(expire_on_commit=False))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def describe_read_routing() -> str:
+    url = config.READ_DATABASE_URL or read_url(SQLALCHEMY_DATABASE_URL)
+    return f"Read-only endpoints: {make_url(url)!r}" if url else "Read-only endpoints: primary engine"
+
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
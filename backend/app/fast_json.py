@@ -0,0 +1,119 @@
+"""Fast JSON path for read-only ORM responses.
+
+FastAPI's default path validates every returned ORM object against the
+``response_model`` (``from_attributes``), walks the result with ``jsonable_encoder``
+and then encodes it with the stdlib ``json`` module. For nested responses such as
+``CourseResponse`` (modules, quiz, questions) that is most of the request's CPU.
+
+Here the field layout of a response schema is resolved once and the ORM attributes
+are copied straight into plain dicts. The objects come from our own mapped columns,
+so validating them again adds nothing. The result is encoded with orjson when it is
+installed, and with the stdlib encoder otherwise.
+
+Routes opt in by returning ``FastJSONResponse`` / ``render()`` output; ``FAST_JSON=0``
+sends them back through pydantic for comparison.
+
+    python -m benchmarks.serialization   # compare the two paths
+"""
+import json
+import typing
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from . import config
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None and config.FAST_JSON:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# A field plan is (name, nested schema or None, is_list, default)
+_FieldPlan = Tuple[str, Optional[type], bool, Any]
+_plans: Dict[type, List[_FieldPlan]] = {}
+
+def _nested(annotation) -> Tuple[Optional[type], bool]:
+    """Unwrap Optional[...] / List[...] to (nested model class or None, is_list)."""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _nested(args[0]) if len(args) == 1 else (None, False)
+    if origin in (list, List):
+        inner, _ = _nested(typing.get_args(annotation)[0])
+        return inner, True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+def _plan(schema: type) -> List[_FieldPlan]:
+    plan = _plans.get(schema)
+    if plan is None:
+        plan = []
+        if hasattr(schema, "model_fields"):
+            fields = [(name, f.annotation, None if f.is_required() else f.get_default(call_default_factory=True))
+                      for name, f in schema.model_fields.items()]
+        else:  # pydantic 1
+            fields = [(name, f.outer_type_, f.get_default()) for name, f in schema.__fields__.items()]
+        for name, annotation, default in fields:
+            nested, is_list = _nested(annotation)
+            plan.append((name, nested, is_list, default))
+        _plans[schema] = plan
+    return plan
+
+def orm_to_dict(obj: Any, schema: type) -> Dict[str, Any]:
+    """Copy the fields of ``schema`` from ``obj`` into a dict, recursing into nested schemas."""
+    result = {}
+    for name, nested, is_list, default in _plan(schema):
+        value = getattr(obj, name, default)
+        if nested is not None and value is not None:
+            if is_list:
+                value = [orm_to_dict(item, nested) for item in value]
+            else:
+                value = orm_to_dict(value, nested)
+        elif is_list and value is None:
+            value = []
+        result[name] = value
+    return result
+
+def _validated(schema: type, obj: Any):
+    if hasattr(schema, "model_validate"):
+        return schema.model_validate(obj, from_attributes=True)
+    return schema.from_orm(obj)  # pydantic 1
+
+def to_content(schema: type, obj: Any) -> Any:
+    """JSON-ready content for ``obj`` (or a list of objects) as ``schema``."""
+    if isinstance(obj, list):
+        return [to_content(schema, item) for item in obj]
+    if config.FAST_JSON:
+        return orm_to_dict(obj, schema)
+    return jsonable_encoder(_validated(schema, obj))
+
+def render(schema: type, obj: Any) -> bytes:
+    """Serialized JSON body for ``obj`` (or a list of objects) as ``schema``."""
+    return dumps(to_content(schema, obj))
+
+def response(schema: type, obj: Any, **kwargs) -> FastJSONResponse:
+    return FastJSONResponse(to_content(schema, obj), **kwargs)
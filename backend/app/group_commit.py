@@ -0,0 +1,177 @@
+"""Group commit for small write transactions.
+
+SQLite has a single writer, and every commit pays for its own journal sync, so a
+stream of one-row submissions is capped by the commit rate long before the CPU is
+busy. With ``GROUP_COMMIT`` enabled, submission handlers hand their rows to a
+``GroupCommitWriter`` instead of committing themselves. One writer thread collects
+whatever arrives within ``max_delay`` seconds (or until ``max_batch_rows`` rows are
+waiting) and writes it in a single transaction, each job in its own savepoint so a
+failing job does not take the rest of the batch with it. Callers wait on a future
+that resolves to the job's flushed rows once they are committed.
+
+At most ``max_pending_rows`` rows may wait for the writer; beyond that submissions
+fail fast with 503 so a write burst turns into client retries, not unbounded memory.
+"""
+import asyncio
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+class _Job:
+    __slots__ = ("fn", "args", "key", "rows", "queued_at", "future")
+
+    def __init__(self, fn: Callable, args: tuple, key: Any, rows: int):
+        self.fn = fn
+        self.args = args
+        self.key = key
+        self.rows = rows
+        self.queued_at = time.monotonic()
+        self.future: Future = Future()
+
+class GroupCommitWriter:
+    def __init__(self, session_factory: Callable[[], Session],
+                 after_commit: Optional[Callable[[Session, Set[Any]], None]] = None,
+                 max_delay: float = 0.005, max_batch_rows: int = 500, max_pending_rows: int = 5000):
+        """``after_commit(db, keys)`` runs after each successful commit with the keys of its jobs."""
+        self._session_factory = session_factory
+        self._after_commit = after_commit
+        self._max_delay = max_delay
+        self._max_batch_rows = max_batch_rows
+        self._max_pending_rows = max_pending_rows
+        self._cond = threading.Condition()
+        self._queue: Deque[_Job] = deque()
+        self._queued_rows = 0
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.jobs = 0
+        self.rows = 0
+        self.batches = 0
+        self.failed = 0
+        self.rejected = 0
+        self.largest_batch = 0
+
+    def submit(self, fn: Callable, *args, key: Any = None, rows: int = 1) -> Future:
+        """Queue ``fn(db, *args)`` for the next batch. The future resolves to its return value."""
+        job = _Job(fn, args, key, rows)
+        with self._cond:
+            if self._queued_rows and self._queued_rows + rows > self._max_pending_rows:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many submissions in flight, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._ensure_started()
+            self._queue.append(job)
+            self._queued_rows += rows
+            self._cond.notify_all()
+        return job.future
+
+    async def submit_async(self, fn: Callable, *args, key: Any = None, rows: int = 1):
+        return await asyncio.wrap_future(self.submit(fn, *args, key=key, rows=rows))
+
+    def shutdown(self):
+        """Write everything still queued, then stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+        with self._cond:
+            self._closed = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "queued_rows": self._queued_rows,
+                "jobs": self.jobs,
+                "rows": self.rows,
+                "batches": self.batches,
+                "rows_per_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+    def _ensure_started(self):
+        # Caller holds self._cond
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> List[_Job]:
+        with self._cond:
+            while not self._queue:
+                if self._closed:
+                    return []
+                self._cond.wait()
+            # Give later submissions until the oldest one's deadline to join the batch
+            while self._queued_rows < self._max_batch_rows and not self._closed:
+                remaining = self._queue[0].queued_at + self._max_delay - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, rows = [], 0
+            while self._queue and (not batch or rows + self._queue[0].rows <= self._max_batch_rows):
+                job = self._queue.popleft()
+                batch.append(job)
+                rows += job.rows
+            self._queued_rows -= rows
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                self._write(batch)
+            except Exception as e:
+                # Never leave a caller waiting forever
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+
+    def _write(self, batch: List[_Job]):
+        db = self._session_factory()
+        try:
+            done = []
+            for job in batch:
+                try:
+                    with db.begin_nested():
+                        result = job.fn(db, *job.args)
+                    done.append((job, result))
+                except Exception as e:
+                    job.future.set_exception(e)
+            try:
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Group commit of {len(done)} job(s) failed: {e}")
+                for job, _ in done:
+                    job.future.set_exception(e)
+                done = []
+            with self._cond:
+                self.batches += 1
+                self.jobs += len(done)
+                self.rows += sum(job.rows for job, _ in done)
+                self.failed += len(batch) - len(done)
+                self.largest_batch = max(self.largest_batch, len(batch))
+            if done and self._after_commit is not None:
+                try:
+                    self._after_commit(db, {job.key for job, _ in done if job.key is not None})
+                except Exception as e:
+                    # The rows are committed; a failed follow-up must not fail the requests
+                    print(f"Group commit follow-up failed: {e}")
+                    traceback.print_exc()
+            for job, result in done:
+                job.future.set_result(result)
+        finally:
+            db.close()
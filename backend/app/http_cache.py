@@ -0,0 +1,113 @@
+"""Conditional GET and pre-compressed bodies for cacheable JSON responses.
+
+A ``Payload`` is a rendered body plus its strong ETag (a hash of the body) and,
+for bodies of at least ``COMPRESSION_MIN_BYTES``, its gzip and (when the optional
+``brotli`` package is installed) brotli encodings. Payloads kept in the catalog
+cache are therefore compressed once per catalog version, not once per request.
+
+``respond()`` answers ``If-None-Match`` with 304 and otherwise picks the best
+encoding the client accepts. Each encoding has its own ETag (``"<hash>-gzip"``) as
+required for strong validators; any of them validates the resource.
+"""
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from . import config
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+# Preferred first
+ENCODINGS = ("br", "gzip")
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+class Payload:
+    __slots__ = ("body", "etag", "encoded")
+
+    def __init__(self, body: bytes, etag: Optional[str] = None, compress: bool = True):
+        self.body = body
+        self.etag = etag or make_etag(body)
+        self.encoded: Dict[str, bytes] = {}
+        if compress and len(body) >= config.COMPRESSION_MIN_BYTES:
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=config.GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(body)
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+def _accepted(accept_encoding: str) -> set:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token)
+    return accepted
+
+def choose_encoding(request: Request, payload: Payload) -> Optional[str]:
+    if not payload.encoded:
+        return None
+    accepted = _accepted(request.headers.get("accept-encoding", ""))
+    for encoding in ENCODINGS:
+        if encoding in payload.encoded and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of If-None-Match against any encoding variant of ``etag``."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate == opaque or any(candidate == f"{opaque}-{encoding}" for encoding in ENCODINGS):
+            return True
+    return False
+
+def not_modified(request: Request, etag: str, cache_control: str = "no-cache") -> Optional[Response]:
+    """A 304 response if the request's If-None-Match covers ``etag``, else None.
+
+    Lets a handler skip rendering entirely when the validator is known up front.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+def respond(request: Request, payload: Payload, headers: Optional[Dict[str, str]] = None,
+            cache_control: str = "no-cache") -> Response:
+    """200 with the best accepted encoding, or 304 when the client's copy is current."""
+    encoding = choose_encoding(request, payload)
+    out = dict(headers or {})
+    out["ETag"] = payload.variant_etag(encoding)
+    out["Cache-Control"] = cache_control
+    if payload.encoded:
+        out["Vary"] = "Accept-Encoding"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=out)
+    if encoding is not None:
+        out["Content-Encoding"] = encoding
+        return Response(content=payload.encoded[encoding], media_type="application/json", headers=out)
+    return Response(content=payload.body, media_type="application/json", headers=out)
@@ -0,0 +1,213 @@
+"""Per-request performance instrumentation and the Prometheus ``/metrics`` endpoint.
+
+``RequestMetricsMiddleware`` times every request by route template. SQLAlchemy cursor
+events on all engines count the statements executed for the current request and
+the time spent in them; the request is found through a context variable, which
+follows it into ``run_sync`` greenlets and threadpool calls. Background work (the
+profile scheduler, CLIs) runs outside any request and is not attributed.
+
+``stage("name")`` times a named step (JWT decode, user lookup, serialization) so the
+rest of a request's wall time can be broken down.
+
+Settings (see config): METRICS_ENABLED, DEBUG adds X-Query-Count and X-SQL-Time-Ms
+response headers, SLOW_REQUEST_MS > 0 logs slower requests with their statements.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import config
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+STATEMENT_MAX_CHARS = 500
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total[0]) for labels, (counts, total) in sorted(self._series.items())]
+        for labels, counts, total in series:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound:g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {cumulative}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Wall time per request.", ("method", "route", "status"), LATENCY_BUCKETS)
+request_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+request_sql_time = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.", ("method", "route"), LATENCY_BUCKETS)
+stage_duration = Histogram(
+    "app_stage_duration_seconds", "Time spent in named request stages.", ("stage",), LATENCY_BUCKETS)
+HISTOGRAMS = [request_duration, request_queries, request_sql_time, stage_duration]
+
+# name -> callable returning a (possibly nested) dict of numbers, exported as gauges
+_stats_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+def register_stats(name: str, provider: Callable[[], Dict[str, Any]]):
+    _stats_providers[name] = provider
+
+def _flatten(prefix: str, stats: Dict[str, Any], out: List[Tuple[str, float]]):
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            _flatten(name, value, out)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out.append((name, value))
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for name, provider in sorted(_stats_providers.items()):
+        values: List[Tuple[str, float]] = []
+        _flatten(f"app_{name}", provider(), values)
+        for metric, value in values:
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    __slots__ = ("query_count", "sql_seconds", "statements", "stages")
+
+    def __init__(self, keep_statements: bool):
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.statements: Optional[List[Tuple[float, str]]] = [] if keep_statements else None
+        self.stages: Dict[str, float] = {}
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+@contextmanager
+def stage(name: str):
+    """Time a named step of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration.observe(elapsed, name)
+        stats = _current.get()
+        if stats is not None:
+            stats.stages[name] = stats.stages.get(name, 0.0) + elapsed
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats.query_count += 1
+    stats.sql_seconds += elapsed
+    if stats.statements is not None and len(stats.statements) < config.SLOW_REQUEST_MAX_STATEMENTS:
+        stats.statements.append((elapsed, " ".join(statement.split())[:STATEMENT_MAX_CHARS]))
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording wall time, query count and SQL time per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(keep_statements=config.SLOW_REQUEST_MS > 0)
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if config.DEBUG:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-query-count", str(stats.query_count).encode()))
+                    headers.append((b"x-sql-time-ms", f"{stats.sql_seconds * 1000:.2f}".encode()))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            # Route templates keep the label set bounded; unmatched paths share one label
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            request_duration.observe(elapsed, method, path, str(status_code))
+            request_queries.observe(stats.query_count, method, path)
+            request_sql_time.observe(stats.sql_seconds, method, path)
+            if config.SLOW_REQUEST_MS > 0 and elapsed * 1000 >= config.SLOW_REQUEST_MS:
+                _log_slow_request(method, scope.get("path", path), status_code, elapsed, stats)
+
+def _log_slow_request(method: str, path: str, status_code: int, elapsed: float, stats: RequestStats):
+    stages = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in stats.stages.items())
+    print(f"Slow request: {method} {path} -> {status_code} in {elapsed * 1000:.1f} ms, "
+          f"{stats.query_count} queries / {stats.sql_seconds * 1000:.1f} ms SQL {stages}".rstrip())
+    for seconds, statement in stats.statements or ():
+        print(f"    {seconds * 1000:8.2f} ms  {statement}")
+    if stats.query_count > len(stats.statements or ()):
+        print(f"    ... {stats.query_count - len(stats.statements or ())} more statement(s)")
+
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,146 @@
+"""Versioned schema migrations for existing databases.
+
+``Base.metadata.create_all`` creates missing tables but never changes tables that
+already exist, so indexes and columns added to the models after a database was
+created are applied here. Each migration runs once, in order, in its own
+transaction, and is recorded in the ``schema_migrations`` table. Steps are written
+to be no-ops on a fresh database where ``create_all`` already built the final schema.
+
+    python -m app.migrations           # apply pending migrations
+    python -m app.migrations --status  # list applied/pending migrations
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from . import models
+from .database import engine as default_engine
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def create_index(table_name: str, index_name: str) -> Callable[[Connection], None]:
+    """Step that creates an index declared on the models, if it does not exist yet."""
+    def step(conn: Connection):
+        table = models.Base.metadata.tables[table_name]
+        index = next(ix for ix in table.indexes if ix.name == index_name)
+        index.create(bind=conn, checkfirst=True)
+    return step
+
+def add_column(table_name: str, column_name: str) -> Callable[[Connection], None]:
+    """Step that adds a column declared on the models, if it does not exist yet."""
+    def step(conn: Connection):
+        if column_name in {c["name"] for c in inspect(conn).get_columns(table_name)}:
+            return
+        column = models.Base.metadata.tables[table_name].c[column_name]
+        ddl_type = column.type.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(f'ALTER TABLE {table_name} ADD COLUMN "{column_name}" {ddl_type}')
+    return step
+
+def backfill_question_choices(conn: Connection):
+    """Parse the comma-separated ``questions.options`` into the ``choices`` JSON column."""
+    from .answer_keys import parse_options
+    questions = models.Question.__table__
+    rows = conn.execute(select(questions.c.id, questions.c.options).where(questions.c.choices.is_(None))).all()
+    if rows:
+        conn.execute(
+            questions.update().where(questions.c.id == bindparam("question_id")).values(choices=bindparam("parsed")),
+            [{"question_id": qid, "parsed": parse_options(options)} for qid, options in rows],
+        )
+
+def backfill_created_at(table_name: str) -> Callable[[Connection], None]:
+    """Step that stamps rows from before ``created_at`` existed with the migration time."""
+    def step(conn: Connection):
+        table = models.Base.metadata.tables[table_name]
+        conn.execute(table.update().where(table.c.created_at.is_(None)).values(created_at=datetime.utcnow()))
+    return step
+
+def backfill_profile_aggregates(conn: Connection):
+    """Build the running totals of every user with history but no ``profile_aggregates`` row.
+
+    Without it the first aggregate is only built lazily, and until then the user is
+    missing from everything that reads the table (cohort statistics, rank, rebuild --check).
+    """
+    from sqlalchemy.orm import Session
+    from .profile_aggregates import scan_aggregates
+    aggregates = models.ProfileAggregate.__table__
+    have = set(conn.execute(select(aggregates.c.user_id)).scalars())
+    with Session(bind=conn) as db:
+        expected = scan_aggregates(db)
+    rows = [dict(values, user_id=user_id, version=1, profile_version=0)
+            for user_id, values in expected.items() if user_id not in have]
+    if rows:
+        conn.execute(aggregates.insert(), rows)
+
+# (version, name, steps). Append only; never renumber or edit an applied migration.
+MIGRATIONS: List[Tuple[int, str, List[Callable[[Connection], None]]]] = [
+    (1, "per-user and difficulty composite indexes", [
+        create_index("behavioral_responses", "ix_behavioral_responses_user_id_id"),
+        create_index("technical_attempts", "ix_technical_attempts_user_id_id"),
+        create_index("courses", "ix_courses_difficulty_id"),
+    ]),
+    (2, "structured question choices", [
+        add_column("questions", "choices"),
+        backfill_question_choices,
+    ]),
+    (3, "response/attempt timestamps", [
+        add_column("behavioral_responses", "created_at"),
+        add_column("technical_attempts", "created_at"),
+        backfill_created_at("behavioral_responses"),
+        backfill_created_at("technical_attempts"),
+        create_index("behavioral_responses", "ix_behavioral_responses_created_at"),
+        create_index("technical_attempts", "ix_technical_attempts_created_at"),
+    ]),
+    (4, "profile aggregates for existing history", [
+        backfill_profile_aggregates,
+    ]),
+]
+
+def applied_versions(conn: Connection) -> set:
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+def upgrade(engine: Engine = default_engine) -> List[int]:
+    """Create missing tables, then apply pending migrations. Returns the versions applied."""
+    models.Base.metadata.create_all(bind=engine)
+    _meta.create_all(bind=engine)
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    applied = []
+    for version, name, steps in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            for step in steps:
+                step(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        print(f"Applied migration {version}: {name}")
+        applied.append(version)
+    return applied
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        _meta.create_all(bind=default_engine)
+        with default_engine.connect() as conn:
+            done = applied_versions(conn)
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:4d}  {'applied' if version in done else 'pending':8s}  {name}")
+        return 0
+    applied = upgrade()
+    print(f"{len(applied)} migration(s) applied.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
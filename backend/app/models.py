@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Index, Integer, JSON, String, Float, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -24,9 +24,15 @@ class BehavioralResponse(Base):
     question_id = Column(Integer)
     selected_option = Column(String)
     score_weight = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="behavioral_responses")
 
+    __table_args__ = (
+        Index("ix_behavioral_responses_user_id_id", "user_id", "id"),
+        Index("ix_behavioral_responses_created_at", "created_at"),
+    )
+
 class TechnicalAttempt(Base):
     __tablename__ = "technical_attempts"
 
@@ -38,9 +44,15 @@ class TechnicalAttempt(Base):
     response_time = Column(Float) # in seconds
     is_correct = Column(Boolean)
     attempt_number = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="technical_attempts")
 
+    __table_args__ = (
+        Index("ix_technical_attempts_user_id_id", "user_id", "id"),
+        Index("ix_technical_attempts_created_at", "created_at"),
+    )
+
 class CognitiveProfile(Base):
     __tablename__ = "cognitive_profiles"
     id = Column(Integer, primary_key=True, index=True)
@@ -53,6 +65,34 @@ class CognitiveProfile(Base):
     last_updated = Column(DateTime, default=datetime.utcnow)
     user = relationship("User", back_populates="profile")
 
+class ProfileAggregate(Base):
+    # Running totals over a user's responses/attempts, maintained on insert so the
+    # profile can be classified without rescanning the full history.
+    __tablename__ = "profile_aggregates"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    behavioral_count = Column(Integer, default=0, nullable=False)
+    behavioral_weight_sum = Column(Float, default=0.0, nullable=False)
+    technical_count = Column(Integer, default=0, nullable=False)
+    correct_count = Column(Integer, default=0, nullable=False)
+    response_time_sum = Column(Float, default=0.0, nullable=False)
+    attempt_number_sum = Column(Integer, default=0, nullable=False)
+    # Bumped on every change; the profile is stale while profile_version lags behind it
+    version = Column(Integer, default=0, nullable=False)
+    profile_version = Column(Integer, default=0, nullable=False)
+
+class DailyRollup(Base):
+    # Per-user, per-day totals of responses/attempts compacted out of the raw tables
+    # (see app/rollups.py). Same fields as ProfileAggregate, summed over one UTC day.
+    __tablename__ = "daily_rollups"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    behavioral_count = Column(Integer, default=0, nullable=False)
+    behavioral_weight_sum = Column(Float, default=0.0, nullable=False)
+    technical_count = Column(Integer, default=0, nullable=False)
+    correct_count = Column(Integer, default=0, nullable=False)
+    response_time_sum = Column(Float, default=0.0, nullable=False)
+    attempt_number_sum = Column(Integer, default=0, nullable=False)
+
 class Course(Base):
     __tablename__ = "courses"
     id = Column(Integer, primary_key=True, index=True)
@@ -64,6 +104,10 @@ class Course(Base):
     modules = relationship("Module", back_populates="course", cascade="all, delete-orphan")
     quiz = relationship("Quiz", back_populates="course", uselist=False, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_courses_difficulty_id", "difficulty", "id"),
+    )
+
 class Module(Base):
     __tablename__ = "modules"
     id = Column(Integer, primary_key=True, index=True)
@@ -90,6 +134,26 @@ class Question(Base):
     quiz_id = Column(Integer, ForeignKey("quizzes.id"))
     text = Column(String)
     options = Column(String) # Store as JSON string or comma-separated
+    choices = Column(JSON, nullable=True) # options parsed into a list, used for grading
     correct_answer = Column(String)
     explanation = Column(String, nullable=True)
     quiz = relationship("Quiz", back_populates="questions")
+
+class CourseCompletion(Base):
+    __tablename__ = "course_completions"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    quiz_score = Column(Integer, nullable=True)
+    completed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_course_completions_user_id_course_id"),
+    )
+
+class ContentSyncState(Base):
+    # Hash of the last seed definition applied to the catalog tables
+    __tablename__ = "content_sync_state"
+    key = Column(String, primary_key=True)
+    content_hash = Column(String)
+    synced_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,193 @@
+"""Per-user running aggregates backing the cognitive profile.
+
+Every submission adds its deltas to the user's ProfileAggregate row with a single
+UPDATE, so classifying the profile costs O(1) instead of a rescan of every response
+and attempt the user has ever made.
+
+A full rescan reads the raw rows plus the daily rollups that older rows were
+compacted into (app/rollups.py). Verify (and repair) the stored aggregates with:
+
+    python -m app.profile_aggregates --check
+    python -m app.profile_aggregates
+"""
+import argparse
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import migrations, models
+from .database import SessionLocal, engine
+
+FIELDS = (
+    "behavioral_count",
+    "behavioral_weight_sum",
+    "technical_count",
+    "correct_count",
+    "response_time_sum",
+    "attempt_number_sum",
+)
+
+def _empty() -> Dict[str, float]:
+    return {field: 0 for field in FIELDS}
+
+def behavioral_deltas(responses: Iterable[models.BehavioralResponse]) -> Dict[str, float]:
+    deltas = _empty()
+    for r in responses:
+        deltas["behavioral_count"] += 1
+        deltas["behavioral_weight_sum"] += r.score_weight
+    return deltas
+
+def technical_deltas(attempts: Iterable[models.TechnicalAttempt]) -> Dict[str, float]:
+    deltas = _empty()
+    for a in attempts:
+        deltas["technical_count"] += 1
+        deltas["correct_count"] += 1 if a.is_correct else 0
+        deltas["response_time_sum"] += a.response_time
+        deltas["attempt_number_sum"] += a.attempt_number
+    return deltas
+
+def scan_aggregates(db: Session, user_ids: Optional[Iterable[int]] = None,
+                    user_range: Optional[Tuple[int, int]] = None) -> Dict[int, Dict[str, float]]:
+    """Recompute aggregates from the raw tables and the daily rollups with three grouped queries.
+
+    ``user_range`` limits the scan to ``lo <= user_id < hi``.
+    """
+    behavioral_q = db.query(
+        models.BehavioralResponse.user_id,
+        func.count(models.BehavioralResponse.id),
+        func.coalesce(func.sum(models.BehavioralResponse.score_weight), 0.0),
+    ).group_by(models.BehavioralResponse.user_id)
+    technical_q = db.query(
+        models.TechnicalAttempt.user_id,
+        func.count(models.TechnicalAttempt.id),
+        func.coalesce(func.sum(case((models.TechnicalAttempt.is_correct == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(models.TechnicalAttempt.response_time), 0.0),
+        func.coalesce(func.sum(models.TechnicalAttempt.attempt_number), 0),
+    ).group_by(models.TechnicalAttempt.user_id)
+    rollup_q = db.query(
+        models.DailyRollup.user_id,
+        *(func.sum(getattr(models.DailyRollup, field)) for field in FIELDS),
+    ).group_by(models.DailyRollup.user_id)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        behavioral_q = behavioral_q.filter(models.BehavioralResponse.user_id.in_(user_ids))
+        technical_q = technical_q.filter(models.TechnicalAttempt.user_id.in_(user_ids))
+        rollup_q = rollup_q.filter(models.DailyRollup.user_id.in_(user_ids))
+    if user_range is not None:
+        lo, hi = user_range
+        behavioral_q = behavioral_q.filter(models.BehavioralResponse.user_id >= lo, models.BehavioralResponse.user_id < hi)
+        technical_q = technical_q.filter(models.TechnicalAttempt.user_id >= lo, models.TechnicalAttempt.user_id < hi)
+        rollup_q = rollup_q.filter(models.DailyRollup.user_id >= lo, models.DailyRollup.user_id < hi)
+
+    result: Dict[int, Dict[str, float]] = {}
+    for user_id, count, weight_sum in behavioral_q:
+        agg = result.setdefault(user_id, _empty())
+        agg["behavioral_count"] = count
+        agg["behavioral_weight_sum"] = weight_sum
+    for user_id, count, correct, time_sum, attempt_sum in technical_q:
+        agg = result.setdefault(user_id, _empty())
+        agg["technical_count"] = count
+        agg["correct_count"] = correct
+        agg["response_time_sum"] = time_sum
+        agg["attempt_number_sum"] = attempt_sum
+    for user_id, *sums in rollup_q:
+        agg = result.setdefault(user_id, _empty())
+        for field, value in zip(FIELDS, sums):
+            agg[field] += value or 0
+    return result
+
+def _build_from_scan(db: Session, user_id: int) -> models.ProfileAggregate:
+    values = scan_aggregates(db, [user_id]).get(user_id, _empty())
+    aggregate = models.ProfileAggregate(user_id=user_id, version=1, profile_version=0, **values)
+    db.add(aggregate)
+    db.flush()
+    return aggregate
+
+def apply_deltas(db: Session, user_id: int, deltas: Dict[str, float]):
+    """Add deltas to the user's aggregate row. Call after the new rows are flushed.
+
+    A user without an aggregate row yet (first submission, or data that predates the
+    table) gets one built from a rescan, which already includes the flushed rows.
+    """
+    increments = {
+        getattr(models.ProfileAggregate, field): getattr(models.ProfileAggregate, field) + value
+        for field, value in deltas.items() if value
+    }
+    if not increments:
+        return
+    increments[models.ProfileAggregate.version] = models.ProfileAggregate.version + 1
+    query = db.query(models.ProfileAggregate).filter(models.ProfileAggregate.user_id == user_id)
+    if query.update(increments, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            _build_from_scan(db, user_id)
+    except IntegrityError:
+        # A concurrent first submission created the row; our rows are not in it yet
+        query.update(increments, synchronize_session=False)
+
+def get_aggregate(db: Session, user_id: int) -> models.ProfileAggregate:
+    aggregate = db.query(models.ProfileAggregate).filter(models.ProfileAggregate.user_id == user_id).first()
+    if aggregate is None:
+        try:
+            with db.begin_nested():
+                aggregate = _build_from_scan(db, user_id)
+        except IntegrityError:
+            # Built concurrently by another request or the recompute scheduler
+            aggregate = db.query(models.ProfileAggregate).filter(models.ProfileAggregate.user_id == user_id).one()
+    return aggregate
+
+def is_stale(aggregate: Optional[models.ProfileAggregate]) -> bool:
+    return aggregate is not None and aggregate.profile_version < aggregate.version
+
+def _matches(stored: models.ProfileAggregate, expected: Dict[str, float]) -> bool:
+    return all(abs((getattr(stored, field) or 0) - expected[field]) < 1e-6 for field in FIELDS)
+
+def rebuild(db: Session, check_only: bool = False) -> int:
+    """Compare every stored aggregate with a full rescan; rewrite mismatches unless check_only.
+
+    Returns the number of users whose stored aggregate was missing or wrong.
+    """
+    expected_by_user = scan_aggregates(db)
+    stored_by_user = {a.user_id: a for a in db.query(models.ProfileAggregate).all()}
+    mismatched = 0
+    for user_id in set(expected_by_user) | set(stored_by_user):
+        expected = expected_by_user.get(user_id, _empty())
+        stored = stored_by_user.get(user_id)
+        if stored is not None and _matches(stored, expected):
+            continue
+        mismatched += 1
+        print(f"User {user_id}: stored={None if stored is None else {f: getattr(stored, f) for f in FIELDS}} expected={expected}")
+        if check_only:
+            continue
+        if stored is None:
+            db.add(models.ProfileAggregate(user_id=user_id, version=1, profile_version=0, **expected))
+        else:
+            for field, value in expected.items():
+                setattr(stored, field, value)
+            # Any profile computed from the wrong totals is now stale
+            stored.version += 1
+    if not check_only:
+        db.commit()
+    return mismatched
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild per-user profile aggregates from the raw response/attempt tables and rollups.")
+    parser.add_argument("--check", action="store_true", help="only report mismatches, exit 1 if any are found")
+    args = parser.parse_args(argv)
+
+    migrations.upgrade(engine)
+    db = SessionLocal()
+    try:
+        mismatched = rebuild(db, check_only=args.check)
+    finally:
+        db.close()
+    action = "found" if args.check else "rebuilt"
+    print(f"{mismatched} aggregate(s) {action}.")
+    return 1 if args.check and mismatched else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
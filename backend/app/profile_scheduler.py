@@ -0,0 +1,159 @@
+"""Background, coalescing scheduler for cognitive-profile recomputation.
+
+Submission handlers call ``schedule(user_id)`` after committing their rows instead of
+recomputing inline. Every schedule call for a user within ``window`` seconds of the
+first one is merged into a single recompute, and at most ``max_workers`` recomputes
+run at once. A user whose recompute is already running is queued again once it
+finishes, so rows committed mid-recompute are never missed. A failed recompute is
+retried up to ``max_retries`` times with exponential backoff from ``retry_backoff``
+seconds, so a transient error does not leave the profile stale until the user's next
+submission.
+"""
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set
+
+class ProfileRecomputeScheduler:
+    def __init__(self, recompute: Callable[[int], None], window: float = 0.5, max_workers: int = 2,
+                 max_retries: int = 3, retry_backoff: float = 1.0):
+        self._recompute = recompute
+        self._window = window
+        self._max_workers = max_workers
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._failures: Dict[int, int] = {}  # user_id -> consecutive failed recomputes
+        self._cond = threading.Condition()
+        self._due: Dict[int, float] = {}  # user_id -> monotonic deadline
+        self._running: Set[int] = set()
+        self._rerun: Set[int] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._closed = False
+        self.scheduled = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.abandoned = 0
+
+    def schedule(self, user_id: int):
+        with self._cond:
+            self._ensure_started()
+            if user_id in self._running:
+                if user_id in self._rerun:
+                    self.coalesced += 1
+                else:
+                    self._rerun.add(user_id)
+                    self.scheduled += 1
+            elif user_id in self._due:
+                self.coalesced += 1
+            else:
+                self._due[user_id] = time.monotonic() + self._window
+                self.scheduled += 1
+                self._cond.notify_all()
+
+    def is_pending(self, user_id: int) -> bool:
+        with self._cond:
+            return user_id in self._due or user_id in self._running
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Run every pending recompute now and block until the queue drains.
+
+        Returns False if ``timeout`` expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._due or self._running or self._rerun:
+                for user_id in self._due:
+                    self._due[user_id] = 0.0
+                self._cond.notify_all()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(0.05 if remaining is None else min(remaining, 0.05))
+        return True
+
+    def shutdown(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            dispatcher, executor = self._dispatcher, self._executor
+            self._dispatcher = self._executor = None
+        if dispatcher is not None:
+            dispatcher.join()
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._cond:
+            self._closed = False
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "pending": len(self._due),
+                "running": len(self._running),
+                "scheduled": self.scheduled,
+                "coalesced": self.coalesced,
+                "completed": self.completed,
+                "failed": self.failed,
+                "retried": self.retried,
+                "abandoned": self.abandoned,
+            }
+
+    def _ensure_started(self):
+        # Caller holds self._cond
+        if self._dispatcher is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="profile-recompute")
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="profile-recompute-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while not (self._closed and not self._due):
+                now = time.monotonic()
+                ready = [user_id for user_id, due_at in self._due.items() if due_at <= now]
+                for user_id in ready:
+                    del self._due[user_id]
+                    self._running.add(user_id)
+                    self._executor.submit(self._run, user_id)
+                if self._due:
+                    self._cond.wait(max(0.0, min(self._due.values()) - now))
+                elif not self._closed:
+                    self._cond.wait()
+
+    def _run(self, user_id: int):
+        try:
+            self._recompute(user_id)
+            error = None
+        except Exception as e:
+            traceback.print_exc()
+            error = e
+        with self._cond:
+            self._running.discard(user_id)
+            due_at = None
+            if user_id in self._rerun:
+                self._rerun.discard(user_id)
+                due_at = time.monotonic() + self._window
+            if error is None:
+                self.completed += 1
+                self._failures.pop(user_id, None)
+            else:
+                self.failed += 1
+                failures = self._failures.get(user_id, 0) + 1
+                if failures <= self._max_retries:
+                    self._failures[user_id] = failures
+                    delay = self._retry_backoff * 2 ** (failures - 1)
+                    print(f"Profile recompute failed for user {user_id}: {error}; "
+                          f"retry {failures}/{self._max_retries} in {delay:g}s")
+                    self.retried += 1
+                    due_at = max(due_at or 0.0, time.monotonic() + delay)
+                else:
+                    self._failures.pop(user_id, None)
+                    print(f"Profile recompute failed for user {user_id}: {error}; giving up after "
+                          f"{failures} attempts, the profile stays stale until the next submission")
+                    self.abandoned += 1
+            if due_at is not None:
+                self._due[user_id] = due_at
+            self._cond.notify_all()
@@ -0,0 +1,76 @@
+"""Cognitive profile scoring and classification.
+
+``classify`` turns a user's running totals (the FIELDS of ``profile_aggregates``)
+into the stored profile values. The request path (``update_cognitive_profile``) and
+the bulk recompute (``python -m app.recompute_profiles``) both go through it, so a
+change to the weights or cutoffs here applies to both.
+"""
+from typing import Dict, Mapping
+
+# Combine: Behavioral (40%), Technical (30%), Speed (15%), Retry (15%)
+BEHAVIORAL_WEIGHT = 0.4
+TECHNICAL_WEIGHT = 0.3
+SPEED_WEIGHT = 0.15
+RETRY_WEIGHT = 0.15
+
+# (upper bound of final score, level, strategy), checked in order
+LEVELS = (
+    (40, "Basic Learner", "Recommend structured learning, Daily 1 hour focused study, Video-based learning."),
+    (60, "Developing Learner", "Focus on foundational concepts and take more practice tests."),
+    (75, "Moderate Performer", "Practice problem solving, Weekly mock tests, Revision strategy."),
+    (90, "Advanced Learner", "Competitive exams practice, Timed quizzes, Analytical challenges."),
+    (float("inf"), "Strong Analytical Learner",
+     "Focus on complex edge-cases, help tutor basic learners, advanced project building."),
+)
+
+def classify(totals: Mapping[str, float]) -> Dict[str, object]:
+    """Profile column values for the given running totals."""
+    behavioral_count = totals.get("behavioral_count") or 0
+    technical_count = totals.get("technical_count") or 0
+
+    # Calculate Behavioral Score (0-100)
+    behavioral_score = 0
+    if behavioral_count:
+        # assuming max question weight is 10 and max questions = 15 -> max score 150
+        behavioral_score = min((totals["behavioral_weight_sum"] / (behavioral_count * 10)) * 100, 100)
+
+    # Calculate Technical Score, Accuracy, Speed
+    technical_accuracy = 0
+    response_speed_score = 0
+    retry_persistence_score = 0
+
+    if technical_count:
+        technical_accuracy = (totals["correct_count"] / technical_count) * 100
+
+        avg_time = totals["response_time_sum"] / technical_count
+        # Assuming optimal time is 30s. Less is better till a threshold, let's normalize this 0-100
+        response_speed_score = max(0, 100 - (max(0, avg_time - 10) * 1.5)) # just an arbitrary scoring metric
+
+        # Retry persistence: higher attempts means more retries
+        retries = totals["attempt_number_sum"] - technical_count
+        retry_persistence_score = min(retries * 10, 100)
+
+    final_score = (behavioral_score * BEHAVIORAL_WEIGHT) + (technical_accuracy * TECHNICAL_WEIGHT) + \
+        (response_speed_score * SPEED_WEIGHT) + (retry_persistence_score * RETRY_WEIGHT)
+
+    # Classification
+    for upper, cognitive_level, strategy in LEVELS:
+        if final_score < upper:
+            break
+
+    # Simple Learning Style Heuristics (based on behavioral questions if we had specific mapping,
+    # for now we derive it from scores: high speed -> Practical, high behavioral -> Theoretical, otherwise Visual)
+    if response_speed_score > 70:
+        learning_style = "Practical"
+    elif behavioral_score > 70:
+        learning_style = "Theoretical"
+    else:
+        learning_style = "Visual"
+
+    return {
+        "behavioral_score": behavioral_score,
+        "technical_score": technical_accuracy,
+        "cognitive_level": cognitive_level,
+        "learning_style": learning_style,
+        "recommended_strategy": strategy,
+    }
@@ -0,0 +1,143 @@
+"""In-memory course recommendation index.
+
+For every course the index scores each kind of content (theoretical text, practical
+labs, visual material: key points or a video) by the share of modules offering it
+and its share of the course's material. Courses are pre-ranked by that score per
+(difficulty, learning_style), so a recommendation is a walk down one ranked list,
+skipping completed courses. The index is built with a single grouped query per
+catalog version.
+
+Rendered results are memoized per user. An entry is used only while the catalog
+version, the profile's ``last_updated`` and the user's set of completed courses
+match. The completions are part of the key because a course may be completed
+through another worker process.
+"""
+import threading
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+
+from . import config, models
+from .cache import TTLCache
+
+# Map cognitive level to difficulty
+DIFFICULTY_FOR_LEVEL = {
+    "Strong Analytical Learner": "Advanced",
+    "Advanced Learner": "Advanced",
+    "Moderate Performer": "Intermediate",
+    "Developing Learner": "Beginner",
+    "Basic Learner": "Beginner",
+}
+DEFAULT_DIFFICULTY = "Beginner"
+STYLES = ("Theoretical", "Practical", "Visual")
+
+def _present(column):
+    return case((and_(column.isnot(None), column != ""), 1), else_=0)
+
+class RecommendationIndex:
+    def __init__(self, courses: Dict[int, Tuple[str, Dict[str, float]]], version: int):
+        """``courses`` maps course id -> (difficulty, {style: share of modules})."""
+        self.version = version
+        self.courses = courses
+        self._ranked: Dict[Tuple[Optional[str], str], List[int]] = {}
+        difficulties = {difficulty for difficulty, _ in courses.values()}
+        for style in STYLES + ("General",):
+            for difficulty in difficulties:
+                ids = [cid for cid, (d, _) in courses.items() if d == difficulty]
+                self._ranked[(difficulty, style)] = self._rank(ids, style)
+            self._ranked[(None, style)] = self._rank(courses, style)
+
+    def _score(self, course_id: int, style: str) -> float:
+        shares = self.courses[course_id][1]
+        if style in shares:
+            return shares[style]
+        # Unknown or default ("General") style: favour courses covering every format
+        return sum(shares.values()) / len(shares) if shares else 0.0
+
+    def _rank(self, course_ids: Iterable[int], style: str) -> List[int]:
+        return sorted(course_ids, key=lambda cid: (-self._score(cid, style), cid))
+
+    @classmethod
+    def build(cls, db: Session, version: int) -> "RecommendationIndex":
+        length = lambda column: func.coalesce(func.sum(func.length(column)), 0)
+        rows = db.query(
+            models.Course.id,
+            models.Course.difficulty,
+            func.count(models.Module.id),
+            func.coalesce(func.sum(_present(models.Module.content_theoretical)), 0),
+            func.coalesce(func.sum(_present(models.Module.content_practical)), 0),
+            func.coalesce(func.sum(case(
+                (_present(models.Module.content_visual) + _present(models.Module.video_url) > 0, 1), else_=0
+            )), 0),
+            length(models.Module.content_theoretical),
+            length(models.Module.content_practical),
+            length(models.Module.content_visual),
+        ).outerjoin(models.Module, models.Module.course_id == models.Course.id).group_by(
+            models.Course.id, models.Course.difficulty
+        ).all()
+        courses = {}
+        for course_id, difficulty, module_count, *counts_and_lengths in rows:
+            counts, lengths = counts_and_lengths[:3], counts_and_lengths[3:]
+            n = module_count or 1
+            total_length = sum(lengths) or 1
+            # Half for how many modules offer the format, half for how much of the material is in it
+            courses[course_id] = (difficulty, {
+                style: 0.5 * count / n + 0.5 * chars / total_length
+                for style, count, chars in zip(STYLES, counts, lengths)
+            })
+        return cls(courses, version)
+
+    def recommend(self, cognitive_level: str, learning_style: str, exclude: Set[int] = frozenset(),
+                  limit: int = 5, min_results: int = 3) -> List[int]:
+        style = learning_style if learning_style in STYLES else "General"
+        difficulty = DIFFICULTY_FOR_LEVEL.get(cognitive_level, DEFAULT_DIFFICULTY)
+        picked = [cid for cid in self._ranked.get((difficulty, style), []) if cid not in exclude][:limit]
+        if len(picked) < min_results:
+            # Not enough at the target difficulty: top up with the best style matches elsewhere
+            chosen = set(picked)
+            others = [cid for cid in self._ranked[(None, style)] if cid not in exclude and cid not in chosen]
+            picked.extend(others[:min_results - len(picked)])
+        return picked
+
+
+class RecommendationCache:
+    """Current index plus the per-user memo of rendered recommendation bodies."""
+
+    def __init__(self, max_users: int, ttl: float):
+        self._lock = threading.Lock()
+        self._index: Optional[RecommendationIndex] = None
+        # user_id -> (catalog version, profile last_updated, completed course ids, body)
+        self._memo = TTLCache(maxsize=max_users, ttl=ttl)
+
+    def index(self, db: Session, version: int) -> RecommendationIndex:
+        index = self._index
+        if index is None or index.version != version:
+            index = RecommendationIndex.build(db, version)
+            with self._lock:
+                if self._index is None or self._index.version < version:
+                    self._index = index
+        return index
+
+    def get(self, user_id: int, version: int, profile_updated, completed: AbstractSet[int]) -> Optional[bytes]:
+        entry = self._memo.get(user_id)
+        if entry is not None and entry[:3] == (version, profile_updated, completed):
+            return entry[3]
+        return None
+
+    def put(self, user_id: int, version: int, profile_updated, completed: AbstractSet[int], body: bytes):
+        self._memo.put(user_id, (version, profile_updated, frozenset(completed), body))
+
+    def invalidate(self, user_id: int):
+        self._memo.pop(user_id)
+
+    def stats(self):
+        index = self._index
+        return {"index_version": index.version if index else 0,
+                "indexed_courses": len(index.courses) if index else 0,
+                "memo": self._memo.stats()}
+
+recommendation_cache = RecommendationCache(
+    max_users=config.RECOMMENDATION_CACHE_MAX_USERS,
+    ttl=config.RECOMMENDATION_CACHE_TTL_SECONDS,
+)
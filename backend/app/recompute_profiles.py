@@ -0,0 +1,123 @@
+"""Recompute every stored cognitive profile, e.g. after changing the weights or
+cutoffs in app/profiling.py.
+
+Profiles are processed in chunks of user IDs spread over a process pool. For each
+chunk, the totals are read with the grouped queries of ``scan_aggregates``, so no
+per-user rows are loaded, and the profiles are written back with one bulk UPDATE.
+Completed chunks are recorded in a checkpoint file, so an interrupted run continues
+where it stopped when started again. The file is removed after a complete run.
+
+    python -m app.recompute_profiles [--workers 4] [--chunk-size 1000]
+    python -m app.recompute_profiles --restart   # ignore an existing checkpoint
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import List, Set, Tuple
+
+from sqlalchemy import func, update
+
+from . import migrations, models, profile_aggregates, profiling
+from .database import SessionLocal, engine
+
+DEFAULT_CHECKPOINT = "recompute_profiles.checkpoint.json"
+
+def _init_worker():
+    # Connections inherited from the parent over fork must not be shared
+    engine.dispose(close=False)
+
+def recompute_chunk(lo: int, hi: int) -> Tuple[int, int, float]:
+    """Recompute profiles with ``lo <= user_id < hi``. Returns (lo, profiles written, seconds)."""
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        profiles = db.query(models.CognitiveProfile.id, models.CognitiveProfile.user_id).filter(
+            models.CognitiveProfile.user_id >= lo, models.CognitiveProfile.user_id < hi
+        ).all()
+        if not profiles:
+            return lo, 0, time.perf_counter() - start
+        totals = profile_aggregates.scan_aggregates(db, user_range=(lo, hi))
+        now = datetime.utcnow()
+        empty = {field: 0 for field in profile_aggregates.FIELDS}
+        rows = [
+            dict(profiling.classify(totals.get(user_id, empty)), id=profile_id, last_updated=now)
+            for profile_id, user_id in profiles
+        ]
+        # Bulk UPDATE by primary key: one executemany for the whole chunk
+        db.execute(update(models.CognitiveProfile), rows)
+        db.commit()
+        return lo, len(rows), time.perf_counter() - start
+    finally:
+        db.close()
+
+def plan_chunks(chunk_size: int) -> List[Tuple[int, int]]:
+    db = SessionLocal()
+    try:
+        lo, hi = db.query(func.min(models.CognitiveProfile.user_id), func.max(models.CognitiveProfile.user_id)).one()
+    finally:
+        db.close()
+    if lo is None:
+        return []
+    return [(start, start + chunk_size) for start in range(lo, hi + 1, chunk_size)]
+
+def _load_checkpoint(path: str, chunk_size: int) -> Set[int]:
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("chunk_size") != chunk_size:
+        raise SystemExit(f"{path} was written with --chunk-size {state.get('chunk_size')}; "
+                         f"use the same chunk size or --restart")
+    return set(state.get("completed", []))
+
+def _save_checkpoint(path: str, chunk_size: int, completed: Set[int]):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"chunk_size": chunk_size, "completed": sorted(completed)}, f)
+    os.replace(tmp, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute all cognitive profiles in parallel user-ID chunks.")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="user IDs per chunk (default: 1000)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help=f"checkpoint file (default: {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--restart", action="store_true", help="discard an existing checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    migrations.upgrade(engine)
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    completed = _load_checkpoint(args.checkpoint, args.chunk_size)
+    chunks = [c for c in plan_chunks(args.chunk_size) if c[0] not in completed]
+    if completed:
+        print(f"Resuming from {args.checkpoint}: {len(completed)} chunk(s) already done.")
+    print(f"Recomputing {len(chunks)} chunk(s) of {args.chunk_size} user IDs with {args.workers} worker(s).")
+
+    written = 0
+    start = time.perf_counter()
+    # Release the parent's connections before forking workers
+    engine.dispose()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(recompute_chunk, lo, hi) for lo, hi in chunks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            lo, count, seconds = future.result()
+            written += count
+            completed.add(lo)
+            _save_checkpoint(args.checkpoint, args.chunk_size, completed)
+            elapsed = time.perf_counter() - start
+            print(f"[{done}/{len(chunks)}] users {lo}-{lo + args.chunk_size - 1}: {count} profiles in {seconds:.2f} s "
+                  f"({written / elapsed:.0f} rows/s overall)")
+
+    elapsed = time.perf_counter() - start
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    rate = written / elapsed if elapsed > 0 else 0.0
+    print(f"{written} profile(s) recomputed in {elapsed:.2f} s ({rate:.0f} rows/s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
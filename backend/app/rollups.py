@@ -0,0 +1,135 @@
+"""Compact old responses/attempts into per-user daily rollups.
+
+Raw ``behavioral_responses`` / ``technical_attempts`` rows older than
+``ROLLUP_AFTER_DAYS`` (counted in whole UTC days) are folded into one
+``daily_rollups`` row per user and day, holding the same totals as the profile
+aggregate, and then deleted. The profile aggregate itself is unchanged: the rows
+move, they are not dropped. Full rescans (``profile_aggregates.scan_aggregates``)
+and ``/analytics/performance`` read the rollups plus the remaining raw tail, so the
+raw tables and per-request scans stay bounded by the retention window. SQLite reuses
+the freed pages, so the file stops growing once the window is full.
+
+Users are processed in ranges of IDs, one transaction per range. Run it from cron:
+
+    python -m app.rollups [--older-than-days 30] [--chunk-size 1000] [--dry-run]
+"""
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from . import config, migrations, models, profile_aggregates
+from .database import SessionLocal, engine
+
+def cutoff_for(days: int, now: Optional[datetime] = None) -> datetime:
+    """Start of the UTC day ``days`` days ago; only whole days before it are compacted."""
+    now = now or datetime.utcnow()
+    return datetime.combine((now - timedelta(days=days)).date(), datetime.min.time())
+
+def _as_date(value) -> date:
+    # func.date() is a date on server databases and an ISO string on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+def _fold(db: Session, model, columns, user_range: Tuple[int, int], cutoff: datetime,
+          rollups: Dict[Tuple[int, date], Dict[str, float]], dry_run: bool) -> int:
+    """Add the grouped totals of ``model`` rows before ``cutoff`` to ``rollups`` and delete them."""
+    lo, hi = user_range
+    in_scope = (model.user_id >= lo, model.user_id < hi, model.created_at < cutoff)
+    # Rows committed while we run are newer than the cutoff, but bound by ID anyway so the
+    # totals and the DELETE cover exactly the same rows
+    max_id = db.query(func.max(model.id)).filter(*in_scope).scalar()
+    if max_id is None:
+        return 0
+    day = func.date(model.created_at)
+    rows = db.query(model.user_id, day, func.count(model.id), *(column for _, column in columns)).filter(
+        *in_scope, model.id <= max_id
+    ).group_by(model.user_id, day).all()
+    folded = 0
+    for user_id, bucket, count, *sums in rows:
+        totals = rollups.setdefault((user_id, _as_date(bucket)), dict.fromkeys(profile_aggregates.FIELDS, 0))
+        for (field, _), value in zip(columns, sums):
+            totals[field] += value or 0
+        folded += count
+    if not dry_run:
+        db.query(model).filter(*in_scope, model.id <= max_id).delete(synchronize_session=False)
+    return folded
+
+def compact(db: Session, cutoff: datetime, user_range: Tuple[int, int], dry_run: bool = False) -> Tuple[int, int]:
+    """Fold rows before ``cutoff`` for ``lo <= user_id < hi`` into rollups and commit.
+
+    Returns (responses folded, attempts folded).
+    """
+    rollups: Dict[Tuple[int, date], Dict[str, float]] = {}
+    behavioral = _fold(db, models.BehavioralResponse, [
+        ("behavioral_count", func.count(models.BehavioralResponse.id)),
+        ("behavioral_weight_sum", func.coalesce(func.sum(models.BehavioralResponse.score_weight), 0.0)),
+    ], user_range, cutoff, rollups, dry_run)
+    technical = _fold(db, models.TechnicalAttempt, [
+        ("technical_count", func.count(models.TechnicalAttempt.id)),
+        ("correct_count", func.coalesce(func.sum(case((models.TechnicalAttempt.is_correct == True, 1), else_=0)), 0)),
+        ("response_time_sum", func.coalesce(func.sum(models.TechnicalAttempt.response_time), 0.0)),
+        ("attempt_number_sum", func.coalesce(func.sum(models.TechnicalAttempt.attempt_number), 0)),
+    ], user_range, cutoff, rollups, dry_run)
+    if dry_run or not rollups:
+        db.rollback()
+        return behavioral, technical
+
+    # Merge into existing rollup rows: a day can be compacted in more than one run
+    # when rows arrive late or the cutoff moves
+    existing = {
+        (r.user_id, r.day): r
+        for r in db.query(models.DailyRollup).filter(
+            models.DailyRollup.user_id.in_({user_id for user_id, _ in rollups}),
+            models.DailyRollup.day.in_({day for _, day in rollups}),
+        )
+    }
+    for (user_id, day), totals in rollups.items():
+        row = existing.get((user_id, day))
+        if row is None:
+            db.add(models.DailyRollup(user_id=user_id, day=day, **totals))
+        else:
+            for field, value in totals.items():
+                setattr(row, field, getattr(row, field) + value)
+    db.commit()
+    return behavioral, technical
+
+def compact_all(older_than_days: int, chunk_size: int, dry_run: bool = False) -> Tuple[int, int]:
+    cutoff = cutoff_for(older_than_days)
+    db = SessionLocal()
+    try:
+        lo, hi = db.query(func.min(models.User.id), func.max(models.User.id)).one()
+        totals = [0, 0]
+        if lo is None:
+            return 0, 0
+        for start in range(lo, hi + 1, chunk_size):
+            behavioral, technical = compact(db, cutoff, (start, start + chunk_size), dry_run=dry_run)
+            totals[0] += behavioral
+            totals[1] += technical
+        return totals[0], totals[1]
+    finally:
+        db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fold old responses/attempts into per-user daily rollups.")
+    parser.add_argument("--older-than-days", type=int, default=config.ROLLUP_AFTER_DAYS,
+                        help=f"compact whole UTC days older than this (default: {config.ROLLUP_AFTER_DAYS})")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="user IDs per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be compacted without writing")
+    args = parser.parse_args(argv)
+    if args.older_than_days < 1 or args.chunk_size < 1:
+        parser.error("--older-than-days and --chunk-size must be at least 1")
+
+    migrations.upgrade(engine)
+    start = time.perf_counter()
+    behavioral, technical = compact_all(args.older_than_days, args.chunk_size, dry_run=args.dry_run)
+    verb = "Would fold" if args.dry_run else "Folded"
+    print(f"{verb} {behavioral} response(s) and {technical} attempt(s) from before "
+          f"{cutoff_for(args.older_than_days):%Y-%m-%d} into daily rollups in {time.perf_counter() - start:.1f}s.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
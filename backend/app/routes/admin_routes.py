@@ -0,0 +1,47 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from .. import config, database, exports, schemas
+from .auth_routes import get_current_user
+from ..user_cache import UserSnapshot
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+)
+
+async def get_admin_user(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
+    if current_user.email.lower() not in config.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+@router.get("/export/{table}")
+async def export_table(
+    table: str,
+    format: schemas.ExportFormat = Query(schemas.ExportFormat.ndjson),
+    user_min: Optional[int] = Query(None, description="Lowest user id to include"),
+    user_max: Optional[int] = Query(None, description="Highest user id to include"),
+    after_id: Optional[int] = Query(None, description="Only rows with a higher id: the previous export's watermark"),
+    since: Optional[datetime] = Query(None, description="Only rows created (profiles: updated) at or after this time"),
+    gzip: bool = Query(False, description="Compress the body with gzip"),
+    admin: UserSnapshot = Depends(get_admin_user)
+):
+    """Stream a whole table as NDJSON or CSV without loading it into memory.
+
+    The highest id included is returned in X-Export-Watermark; pass it as ``after_id``
+    to fetch only newer rows next time.
+    """
+    if table not in exports.EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export {table!r}; choose from {', '.join(sorted(exports.EXPORTS))}")
+    flt = exports.ExportFilter(user_min=user_min, user_max=user_max, after_id=after_id, since=since)
+    # The watermark query runs now; the rows are read by StreamingResponse on the threadpool
+    max_id, chunks = await run_in_threadpool(exports.stream, database.get_read_engine(), table, format.value, flt, gzip)
+    filename = f"{table}.{format.value}" + (".gz" if gzip else "")
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Export-Watermark": str(max_id if max_id is not None else after_id if after_id is not None else 0),
+    }
+    media_type = "application/gzip" if gzip else exports.MEDIA_TYPES[format.value]
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
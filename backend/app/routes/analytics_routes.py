@@ -1,43 +1,128 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-from .. import models, database
+from typing import List, Dict, Any, Optional
+from .. import models, schemas, database, config, fast_json
+from ..cohort_stats import cohort_cache, percentile_rank, summary
 from .auth_routes import get_current_user
+from ..user_cache import UserSnapshot
 
 router = APIRouter(
     prefix="/analytics",
     tags=["Analytics"],
 )
 
-@router.get("/performance")
-def get_performance_analytics(
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
-):
-    # Fetch attempts
-    attempts = db.query(models.TechnicalAttempt).filter(models.TechnicalAttempt.user_id == current_user.id).all()
-    # Fetch behavioral
-    behavioral = db.query(models.BehavioralResponse).filter(models.BehavioralResponse.user_id == current_user.id).all()
+def _performance_analytics(db: Session, current_user: UserSnapshot, window: int):
+    # Totals are the daily rollups of compacted history plus aggregate queries over the
+    # raw tail; only the last `window` attempts are loaded, so the cost no longer grows
+    # with the user's history. All of it is read from one snapshot, so a submission (or
+    # a compaction) landing in between cannot make the totals disagree with the window
+    database.begin_snapshot(db)
+    raw_attempts, raw_correct = db.query(
+        func.count(models.TechnicalAttempt.id),
+        func.coalesce(func.sum(case((models.TechnicalAttempt.is_correct == True, 1), else_=0)), 0)
+    ).filter(models.TechnicalAttempt.user_id == current_user.id).one()
+    raw_behavioral = db.query(func.count(models.BehavioralResponse.id)).filter(
+        models.BehavioralResponse.user_id == current_user.id
+    ).scalar()
+    rolled_attempts, rolled_correct, rolled_behavioral = db.query(
+        func.coalesce(func.sum(models.DailyRollup.technical_count), 0),
+        func.coalesce(func.sum(models.DailyRollup.correct_count), 0),
+        func.coalesce(func.sum(models.DailyRollup.behavioral_count), 0),
+    ).filter(models.DailyRollup.user_id == current_user.id).one()
+    total_attempts = raw_attempts + rolled_attempts
+    total_correct = raw_correct + rolled_correct
+    total_behavioral = raw_behavioral + rolled_behavioral
+    # Compacted attempts only exist as daily totals, so the trends cover the raw tail
+    recent = db.query(
+        models.TechnicalAttempt.is_correct,
+        models.TechnicalAttempt.response_time
+    ).filter(
+        models.TechnicalAttempt.user_id == current_user.id
+    ).order_by(models.TechnicalAttempt.id.desc()).limit(window).all()
+    recent.reverse()
     # Fetch profile
     profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == current_user.id).first()
 
     accuracy_trend: List[Dict[str, Any]] = []
     response_time_trend: List[Dict[str, Any]] = []
-    
-    # Process attempts to generate trend data
-    # (Assuming questions are done sequentially)
-    total_correct = 0
-    for idx, attempt in enumerate(attempts):
-        total_correct += 1 if attempt.is_correct else 0
-        acc = float((total_correct / (idx + 1)) * 100)
-        accuracy_trend.append({"attempt": idx + 1, "accuracy": round(acc, 2)})
-        response_time_trend.append({"attempt": idx + 1, "time": attempt.response_time})
+
+    # Running accuracy is a prefix count: start from the number of correct attempts
+    # before the window and walk forward (assuming questions are done sequentially)
+    attempt_number = total_attempts - len(recent)
+    running_correct = total_correct - sum(1 for is_correct, _ in recent if is_correct)
+    for is_correct, response_time in recent:
+        attempt_number += 1
+        running_correct += 1 if is_correct else 0
+        acc = float((running_correct / attempt_number) * 100)
+        accuracy_trend.append({"attempt": attempt_number, "accuracy": round(acc, 2)})
+        response_time_trend.append({"attempt": attempt_number, "time": response_time})
 
     return {
-        "profile": profile,
-        "accuracy_trend": accuracy_trend[-10:], # last 10
-        "response_time_trend": response_time_trend[-10:],
-        "total_attempts": len(attempts),
-        "total_behavioral_responses": len(behavioral)
+        "profile": fast_json.to_content(schemas.CognitiveProfileResponse, profile) if profile else None,
+        "accuracy_trend": accuracy_trend,
+        "response_time_trend": response_time_trend,
+        "total_attempts": total_attempts,
+        "total_behavioral_responses": total_behavioral
     }
 
+@router.get("/performance")
+async def get_performance_analytics(
+    window: int = Query(10, ge=1, le=500, description="Number of most recent attempts to include in the trends"),
+    db=Depends(database.get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    return fast_json.FastJSONResponse(await db.run_sync(_performance_analytics, current_user, window))
+
+
+def _cohort_snapshot():
+    snapshot = cohort_cache.get(wait=config.COHORT_STATS_WAIT_SECONDS)
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Cohort statistics are being computed", headers={"Retry-After": "5"})
+    return snapshot
+
+@router.get("/cohort")
+async def get_cohort_analytics(current_user: UserSnapshot = Depends(get_current_user)):
+    """Distribution of accuracy, response time and behavioral score across all users."""
+    # The snapshot is computed in the background; the event loop only waits on it at cold start
+    snapshot = await run_in_threadpool(_cohort_snapshot)
+    return fast_json.FastJSONResponse(summary(snapshot))
+
+def _own_metrics(db: Session, user_id: int) -> Dict[str, Optional[float]]:
+    aggregate = db.query(models.ProfileAggregate).filter(models.ProfileAggregate.user_id == user_id).first()
+    profile = db.query(models.CognitiveProfile.cognitive_level).filter(models.CognitiveProfile.user_id == user_id).first()
+    metrics: Dict[str, Any] = {"accuracy": None, "response_time": None, "behavioral": None,
+                               "cognitive_level": profile[0] if profile else None}
+    if aggregate is not None and aggregate.technical_count:
+        metrics["accuracy"] = aggregate.correct_count / aggregate.technical_count * 100
+        metrics["response_time"] = aggregate.response_time_sum / aggregate.technical_count
+    if aggregate is not None and aggregate.behavioral_count:
+        metrics["behavioral"] = min(aggregate.behavioral_weight_sum / (aggregate.behavioral_count * 10) * 100, 100)
+    return metrics
+
+@router.get("/cohort/rank")
+async def get_cohort_rank(
+    db=Depends(database.get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Where the current user stands in the cohort, as percentile ranks (higher is better)."""
+    own = await db.run_sync(_own_metrics, current_user.id)
+    snapshot = await run_in_threadpool(_cohort_snapshot)
+
+    def rank(values, value, lower_is_better=False):
+        if value is None:
+            return None
+        pct = percentile_rank(values, value)
+        return None if pct is None else round(100 - pct, 2) if lower_is_better else pct
+
+    level = own["cognitive_level"]
+    return fast_json.FastJSONResponse({
+        "computed_at": snapshot.computed_at,
+        "user_count": snapshot.user_count,
+        "technical_accuracy": {"value": own["accuracy"], "percentile": rank(snapshot.accuracy, own["accuracy"])},
+        "response_time": {"value": own["response_time"],
+                          "percentile": rank(snapshot.response_time, own["response_time"], lower_is_better=True)},
+        "behavioral_score": {"value": own["behavioral"], "percentile": rank(snapshot.behavioral, own["behavioral"])},
+        "cognitive_level": {"value": level, "users_at_level": snapshot.level_counts.get(level, 0) if level else None},
+    })
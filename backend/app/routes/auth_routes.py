@@ -1,19 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from .. import models, schemas, auth, database
+from .. import models, schemas, auth, database, instrumentation, user_cache
 
 router = APIRouter(
     prefix="/auth",
     tags=["Authentication"],
 )
 
-@router.post("/register", response_model=schemas.UserResponse)
-def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = auth.get_password_hash(user.password)
+def _get_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
+def _create_user(db: Session, user: schemas.UserCreate, hashed_password: str):
     new_user = models.User(
         name=user.name,
         email=user.email,
@@ -24,34 +21,56 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_d
     db.refresh(new_user)
     return new_user
 
+def _update_password_hash(db: Session, user: models.User, new_hash: str):
+    user.password_hash = new_hash
+    db.commit()
+
+@router.post("/register", response_model=schemas.UserResponse)
+async def register_user(user: schemas.UserCreate, db=Depends(database.get_async_db)):
+    db_user = await db.run_sync(_get_user_by_email, user.email)
+    if db_user:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    hashed_password = await auth.password_hasher.hash_async(user.password)
+    return await db.run_sync(_create_user, user, hashed_password)
+
 @router.post("/login", response_model=schemas.Token)
-def login_user(login_data: schemas.LoginRequest, db: Session = Depends(database.get_db)):
-    user = db.query(models.User).filter(models.User.email == login_data.email).first()
+async def login_user(login_data: schemas.LoginRequest, db=Depends(database.get_async_db)):
+    user = await db.run_sync(_get_user_by_email, login_data.email)
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    
-    if not auth.verify_password(login_data.password, user.password_hash):
+
+    valid, new_hash = await auth.password_hasher.verify_and_update_async(login_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid credentials")
-        
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS; upgrade it transparently
+        await db.run_sync(_update_password_hash, user, new_hash)
+
     access_token = auth.create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(token: str = Depends(auth.verify_access_token), db: Session = Depends(database.get_db)):
+async def get_current_user(token: str = Depends(auth.verify_access_token), db=Depends(database.get_async_db)) -> user_cache.UserSnapshot:
     if token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(models.User).filter(models.User.email == token).first()
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+    with instrumentation.stage("user_lookup"):
+        user = await db.run_sync(_get_user_by_email, token)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    # Handlers only read the returned user, so every request gets the same immutable snapshot
+    return user_cache.put(user)
 
 @router.get("/me", response_model=schemas.UserResponse)
-def get_user_me(current_user: models.User = Depends(get_current_user)):
+async def get_user_me(current_user: user_cache.UserSnapshot = Depends(get_current_user)):
     return current_user
@@ -1,23 +1,194 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
-from .. import models, schemas, database
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Union
+from .. import models, schemas, database, fast_json, http_cache, instrumentation
+from ..answer_keys import answer_key_cache
+from ..catalog_cache import catalog_cache
+from ..recommendation_index import recommendation_cache
+from ..user_cache import UserSnapshot
+from .auth_routes import get_current_user
 
 router = APIRouter(
     prefix="/courses",
     tags=["Courses"],
 )
 
-@router.get("/", response_model=List[schemas.CourseResponse])
-def get_courses(db: Session = Depends(database.get_db)):
-    return db.query(models.Course).options(joinedload(models.Course.modules)).all()
+MAX_PAGE_SIZE = 100
 
-@router.get("/{course_id}", response_model=schemas.CourseResponse)
-def get_course(course_id: int, db: Session = Depends(database.get_db)):
+def _to_json(schema, obj) -> bytes:
+    with instrumentation.stage("serialize"):
+        return fast_json.render(schema, obj)
+
+def _render_course_list(db: Session, fields: schemas.CourseFields, difficulty: Optional[str],
+                        after: Optional[int], limit: Optional[int]):
+    query = db.query(models.Course)
+    if fields == schemas.CourseFields.summary:
+        # Never read the large module text columns from the database
+        query = query.options(selectinload(models.Course.modules).defer(models.Module.content_theoretical)
+                              .defer(models.Module.content_practical).defer(models.Module.content_visual))
+        schema = schemas.CourseSummaryResponse
+    else:
+        query = query.options(
+            selectinload(models.Course.modules),
+            selectinload(models.Course.quiz).selectinload(models.Quiz.questions)
+        )
+        schema = schemas.CourseResponse
+    if difficulty is not None:
+        query = query.filter(models.Course.difficulty == difficulty)
+    if after is not None:
+        query = query.filter(models.Course.id > after)
+    query = query.order_by(models.Course.id)
+    if limit is not None:
+        # One extra row tells us whether there is a next page
+        query = query.limit(limit + 1)
+    courses = query.all()
+    next_cursor = None
+    if limit is not None and len(courses) > limit:
+        courses = courses[:limit]
+        next_cursor = courses[-1].id
+    # Compressed here, once per catalog version, not per request
+    return http_cache.Payload(_to_json(schema, courses)), next_cursor
+
+def cached_course_list(db: Session, fields: schemas.CourseFields, difficulty: Optional[str] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None):
+    """(Payload, next cursor) for one course list page, from the catalog cache when possible."""
+    key = (fields.value, difficulty, after, limit)
+    cached = catalog_cache.get_list(key)
+    if cached is None:
+        version = catalog_cache.version
+        cached = _render_course_list(db, fields, difficulty, after, limit)
+        catalog_cache.put_list(key, cached, version)
+    return cached
+
+# fields=summary returns CourseSummaryResponse bodies
+@router.get("/", response_model=Union[List[schemas.CourseResponse], List[schemas.CourseSummaryResponse]])
+async def get_courses(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; all courses when omitted"),
+    after: Optional[int] = Query(None, description="Cursor: only return courses with an id greater than this"),
+    difficulty: Optional[str] = Query(None),
+    fields: schemas.CourseFields = Query(schemas.CourseFields.full, description="'summary' omits module content and quizzes"),
+    db=Depends(database.get_async_read_db)
+):
+    """List courses ordered by id, optionally one keyset page at a time.
+
+    When more courses follow the page, the cursor for the next one is returned in
+    the X-Next-Cursor header. Responses carry an ETag and honour If-None-Match.
+    """
+    key = (fields.value, difficulty, after, limit)
+    cached = catalog_cache.get_list(key)
+    if cached is None:
+        cached = await db.run_sync(cached_course_list, fields, difficulty, after, limit)
+    payload, next_cursor = cached
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return http_cache.respond(request, payload, headers)
+
+def _render_course(db: Session, course_id: int):
     course = db.query(models.Course).options(
-        joinedload(models.Course.modules),
-        joinedload(models.Course.quiz).joinedload(models.Quiz.questions)
+        selectinload(models.Course.modules),
+        selectinload(models.Course.quiz).selectinload(models.Quiz.questions)
     ).filter(models.Course.id == course_id).first()
-    if not course:
+    return http_cache.Payload(_to_json(schemas.CourseResponse, course)) if course else None
+
+def cached_course_payload(db: Session, course_id: int) -> Optional[http_cache.Payload]:
+    """Serialized CourseResponse for one course, from the catalog cache when possible."""
+    payload = catalog_cache.get_course(course_id)
+    if payload is None:
+        version = catalog_cache.version
+        payload = _render_course(db, course_id)
+        if payload is not None:
+            catalog_cache.put_course(course_id, payload, version)
+    return payload
+
+@router.get("/{course_id}", response_model=schemas.CourseResponse)
+async def get_course(course_id: int, request: Request, db=Depends(database.get_async_read_db)):
+    payload = catalog_cache.get_course(course_id)
+    if payload is None:
+        payload = await db.run_sync(cached_course_payload, course_id)
+        if payload is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+    return http_cache.respond(request, payload)
+
+def _complete_course(db: Session, user_id: int, course_id: int, quiz_score: Optional[int]):
+    if db.query(models.Course.id).filter(models.Course.id == course_id).first() is None:
+        return None
+    completion = db.query(models.CourseCompletion).filter(
+        models.CourseCompletion.user_id == user_id, models.CourseCompletion.course_id == course_id
+    ).first()
+    if completion is None:
+        completion = models.CourseCompletion(user_id=user_id, course_id=course_id, quiz_score=quiz_score)
+        db.add(completion)
+    elif quiz_score is not None:
+        completion.quiz_score = max(quiz_score, completion.quiz_score or 0)
+    db.commit()
+    return completion
+
+@router.post("/{course_id}/complete", response_model=schemas.CourseCompletionResponse)
+async def complete_course(
+    course_id: int,
+    data: schemas.CourseCompletionCreate = schemas.CourseCompletionCreate(),
+    db=Depends(database.get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Mark the course as completed; completed courses are no longer recommended."""
+    completion = await db.run_sync(_complete_course, current_user.id, course_id, data.quiz_score)
+    if completion is None:
         raise HTTPException(status_code=404, detail="Course not found")
-    return course
+    recommendation_cache.invalidate(current_user.id)
+    return fast_json.response(schemas.CourseCompletionResponse, completion)
+
+def _grade_quiz(db: Session, user_id: int, course_id: int, submission: schemas.QuizSubmission):
+    index = answer_key_cache.index(db, catalog_cache.version)
+    quiz_id = index.quiz_for_course.get(course_id)
+    if quiz_id is None:
+        if db.query(models.Course.id).filter(models.Course.id == course_id).first() is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+        raise HTTPException(status_code=404, detail="This course has no quiz")
+    question_ids = index.questions_for_quiz[quiz_id]
+    selected = {}
+    for answer in submission.answers:
+        key = index.keys.get(answer.question_id)
+        if key is None or key.quiz_id != quiz_id:
+            raise HTTPException(status_code=400, detail=f"Question {answer.question_id} is not part of this quiz")
+        if answer.question_id in selected:
+            raise HTTPException(status_code=400, detail=f"Question {answer.question_id} answered more than once")
+        selected[answer.question_id] = answer.selected_answer
+
+    results = []
+    for question_id in question_ids:
+        key = index.keys[question_id]
+        answer = selected.get(question_id, "")
+        results.append({
+            "question_id": question_id,
+            "selected_answer": answer,
+            "is_correct": key.is_correct(answer),
+            "correct_answer": key.correct_answer,
+            "explanation": key.explanation,
+        })
+    score = sum(1 for r in results if r["is_correct"])
+    completion = _complete_course(db, user_id, course_id, score) if submission.complete else None
+    return {
+        "course_id": course_id,
+        "quiz_id": quiz_id,
+        "score": score,
+        "total": len(question_ids),
+        "results": results,
+        "completion": fast_json.to_content(schemas.CourseCompletionResponse, completion) if completion else None,
+    }
+
+@router.post("/{course_id}/quiz/grade", response_model=schemas.QuizGradeResponse)
+async def grade_quiz(
+    course_id: int,
+    submission: schemas.QuizSubmission,
+    db=Depends(database.get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Grade a quiz attempt against the stored answer key.
+
+    Unanswered questions count as wrong. With ``complete`` the course is also marked
+    completed with the graded score, as ``POST /{course_id}/complete`` would.
+    """
+    result = await db.run_sync(_grade_quiz, current_user.id, course_id, submission)
+    if submission.complete:
+        recommendation_cache.invalidate(current_user.id)
+    return fast_json.FastJSONResponse(result)
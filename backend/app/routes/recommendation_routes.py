@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
-from .. import models, schemas, database
+from datetime import datetime
+from .. import models, schemas, database, config, fast_json, http_cache, profile_aggregates, profiling
+from ..catalog_cache import catalog_cache
+from ..profile_scheduler import ProfileRecomputeScheduler
+from ..recommendation_index import recommendation_cache
+from .course_routes import cached_course_payload
 from .auth_routes import get_current_user
+from ..user_cache import UserSnapshot
 
 router = APIRouter(
     prefix="/recommendations",
@@ -10,119 +17,109 @@ router = APIRouter(
 )
 
 def update_cognitive_profile(user_id: int, db: Session):
-    behavioral_responses = db.query(models.BehavioralResponse).filter(models.BehavioralResponse.user_id == user_id).all()
-    technical_attempts = db.query(models.TechnicalAttempt).filter(models.TechnicalAttempt.user_id == user_id).all()
-    
-    # Calculate Behavioral Score (0-100)
-    behavioral_score = 0
-    if behavioral_responses:
-        total_weight = sum(r.score_weight for r in behavioral_responses)
-        # assuming max question weight is 10 and max questions = 15 -> max score 150
-        behavioral_score = min((total_weight / (len(behavioral_responses) * 10)) * 100, 100)
-        
-    # Calculate Technical Score, Accuracy, Speed
-    technical_accuracy = 0
-    response_speed_score = 0
-    retry_persistence_score = 0
-    
-    if technical_attempts:
-        correct_count = sum(1 for a in technical_attempts if a.is_correct)
-        technical_accuracy = (correct_count / len(technical_attempts)) * 100
-        
-        avg_time = sum(a.response_time for a in technical_attempts) / len(technical_attempts)
-        # Assuming optimal time is 30s. Less is better till a threshold, let's normalize this 0-100
-        response_speed_score = max(0, 100 - (max(0, avg_time - 10) * 1.5)) # just an arbitrary scoring metric
-        
-        # Retry persistence: higher attempts means more retries
-        retries = sum(a.attempt_number for a in technical_attempts) - len(technical_attempts)
-        retry_persistence_score = min(retries * 10, 100)
-        
-    # Combine: Behavioral (40%), Technical (30%), Speed (15%), Retry (15%)
-    final_score = (behavioral_score * 0.4) + (technical_accuracy * 0.3) + (response_speed_score * 0.15) + (retry_persistence_score * 0.15)
-    
-    # Classification
-    if final_score < 40:
-        cognitive_level = "Basic Learner"
-        strategy = "Recommend structured learning, Daily 1 hour focused study, Video-based learning."
-    elif final_score < 60:
-        cognitive_level = "Developing Learner"
-        strategy = "Focus on foundational concepts and take more practice tests."
-    elif final_score < 75:
-        cognitive_level = "Moderate Performer"
-        strategy = "Practice problem solving, Weekly mock tests, Revision strategy."
-    elif final_score < 90:
-        cognitive_level = "Advanced Learner"
-        strategy = "Competitive exams practice, Timed quizzes, Analytical challenges."
-    else:
-        cognitive_level = "Strong Analytical Learner"
-        strategy = "Focus on complex edge-cases, help tutor basic learners, advanced project building."
-        
-    # Simple Learning Style Heuristics (based on behavioral questions if we had specific mapping,
-    # for now we derive it from scores: high speed -> Practical, high behavioral -> Theoretical, otherwise Visual)
-    if response_speed_score > 70:
-        learning_style = "Practical"
-    elif behavioral_score > 70:
-        learning_style = "Theoretical"
-    else:
-        learning_style = "Visual"
+    # Running totals are maintained on insert (see profile_aggregates), so this is O(1)
+    aggregate = profile_aggregates.get_aggregate(db, user_id)
+    source_version = aggregate.version
+    # Scoring and classification are shared with the bulk recompute (app/profiling.py)
+    values = profiling.classify({field: getattr(aggregate, field) for field in profile_aggregates.FIELDS})
+    values["last_updated"] = datetime.utcnow()
 
     profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == user_id).first()
-    if profile:
-        profile.behavioral_score = behavioral_score
-        profile.technical_score = technical_accuracy
-        profile.cognitive_level = cognitive_level
-        profile.learning_style = learning_style
-        profile.recommended_strategy = strategy
-    else:
-        profile = models.CognitiveProfile(
-            user_id=user_id,
-            behavioral_score=behavioral_score,
-            technical_score=technical_accuracy,
-            cognitive_level=cognitive_level,
-            learning_style=learning_style,
-            recommended_strategy=strategy
-        )
-        db.add(profile)
+    if profile is None:
+        try:
+            with db.begin_nested():
+                db.add(models.CognitiveProfile(user_id=user_id, **values))
+        except IntegrityError:
+            # A concurrent request created the profile first; overwrite it below
+            profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == user_id).one()
+    if profile is not None:
+        for field, value in values.items():
+            setattr(profile, field, value)
+    aggregate.profile_version = source_version
     db.commit()
 
-@router.get("/profile", response_model=schemas.CognitiveProfileResponse)
-def get_cognitive_profile(
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
-):
-    profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == current_user.id).first()
+def _recompute_profile(user_id: int):
+    db = database.SessionLocal()
+    try:
+        update_cognitive_profile(user_id, db)
+    finally:
+        db.close()
+
+profile_scheduler = ProfileRecomputeScheduler(
+    _recompute_profile,
+    window=config.PROFILE_RECOMPUTE_WINDOW_SECONDS,
+    max_workers=config.PROFILE_RECOMPUTE_WORKERS,
+    max_retries=config.PROFILE_RECOMPUTE_MAX_RETRIES,
+    retry_backoff=config.PROFILE_RECOMPUTE_RETRY_BACKOFF_SECONDS,
+)
+
+def refresh_profile(user_id: int, db: Session):
+    """Commit the caller's pending rows and bring the user's profile up to date.
+
+    In deferred mode the recompute is handed to the background scheduler, so the
+    request only pays for its own commit.
+    """
+    if config.PROFILE_RECOMPUTE_DEFERRED:
+        db.commit()
+        profile_scheduler.schedule(user_id)
+    else:
+        update_cognitive_profile(user_id, db)
+
+def _get_or_create_profile(db: Session, user_id: int) -> models.CognitiveProfile:
+    profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == user_id).first()
     if not profile:
-        update_cognitive_profile(current_user.id, db)
-        profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == current_user.id).first()
+        update_cognitive_profile(user_id, db)
+        profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == user_id).first()
     return profile
 
-@router.get("/courses", response_model=List[schemas.CourseResponse])
-def get_recommended_courses(
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+def _load_profile(db: Session, user_id: int) -> models.CognitiveProfile:
+    profile = _get_or_create_profile(db, user_id)
+    aggregate = db.query(models.ProfileAggregate).filter(models.ProfileAggregate.user_id == user_id).first()
+    # Not a mapped column; lets the response report rows that a pending recompute has not covered yet
+    profile.is_stale = profile_aggregates.is_stale(aggregate)
+    return profile
+
+# Per-user data: never stored by shared caches, always revalidated by the browser
+PROFILE_CACHE_CONTROL = "private, no-cache"
+
+@router.get("/profile", response_model=schemas.CognitiveProfileResponse)
+async def get_cognitive_profile(
+    request: Request,
+    db=Depends(database.get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == current_user.id).first()
-    if not profile:
-        update_cognitive_profile(current_user.id, db)
-        profile = db.query(models.CognitiveProfile).filter(models.CognitiveProfile.user_id == current_user.id).first()
-    
-    # Map cognitive level to difficulty
-    level_map = {
-        "Strong Analytical Learner": "Advanced",
-        "Advanced Learner": "Advanced",
-        "Moderate Performer": "Intermediate",
-        "Developing Learner": "Beginner",
-        "Basic Learner": "Beginner"
-    }
-    target_difficulty = level_map.get(profile.cognitive_level, "Beginner")
-    
-    # Fetch courses matching difficulty
-    recommended = db.query(models.Course).filter(models.Course.difficulty == target_difficulty).limit(5).all()
-    
-    # If not enough, fill with others
-    if len(recommended) < 3:
-        others = db.query(models.Course).filter(models.Course.difficulty != target_difficulty).limit(3).all()
-        recommended.extend(others)
-        
-    return recommended
+    profile = await db.run_sync(_load_profile, current_user.id)
+    # last_updated changes with every recompute, so it validates the whole representation
+    etag = http_cache.make_etag(profile.user_id, profile.last_updated.isoformat(), profile.is_stale)
+    cached = http_cache.not_modified(request, etag, cache_control=PROFILE_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+    payload = http_cache.Payload(fast_json.render(schemas.CognitiveProfileResponse, profile), etag=etag)
+    return http_cache.respond(request, payload, cache_control=PROFILE_CACHE_CONTROL)
+
+def _recommend_courses(db: Session, user_id: int) -> bytes:
+    profile = _get_or_create_profile(db, user_id)
+    version = catalog_cache.version
+    # Read on every request: completions recorded by another worker must not be recommended
+    completed = frozenset(cid for (cid,) in db.query(models.CourseCompletion.course_id).filter(
+        models.CourseCompletion.user_id == user_id))
+    body = recommendation_cache.get(user_id, version, profile.last_updated, completed)
+    if body is not None:
+        return body
+
+    index = recommendation_cache.index(db, version)
+    course_ids = index.recommend(profile.cognitive_level, profile.learning_style, exclude=completed,
+                                 limit=config.RECOMMENDATION_LIMIT, min_results=config.RECOMMENDATION_MIN_RESULTS)
+    payloads = [cached_course_payload(db, cid) for cid in course_ids]
+    body = b"[" + b",".join(p.body for p in payloads if p is not None) + b"]"
+    recommendation_cache.put(user_id, version, profile.last_updated, completed, body)
+    return body
 
+@router.get("/courses", response_model=List[schemas.CourseResponse])
+async def get_recommended_courses(
+    db=Depends(database.get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Courses at the user's level, best match for their learning style first, completed ones excluded."""
+    body = await db.run_sync(_recommend_courses, current_user.id)
+    return Response(content=body, media_type="application/json")
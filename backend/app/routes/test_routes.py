@@ -1,53 +1,120 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from .. import models, schemas, database
+from .. import config, models, schemas, database, fast_json, profile_aggregates
 from .auth_routes import get_current_user
-from .recommendation_routes import update_cognitive_profile
+from ..group_commit import GroupCommitWriter
+from ..user_cache import UserSnapshot
+from .recommendation_routes import refresh_profile
 
 router = APIRouter(
     prefix="/tests",
     tags=["Tests"],
 )
 
+def _add_behavioral(db: Session, user_id: int, responses: List[schemas.BehavioralResponseCreate]):
+    db_responses = [
+        models.BehavioralResponse(
+            user_id=user_id,
+            question_id=response.question_id,
+            selected_option=response.selected_option,
+            score_weight=response.score_weight
+        )
+        for response in responses
+    ]
+    # Single multi-row INSERT, committed once together with the aggregate update
+    db.add_all(db_responses)
+    db.flush()
+    profile_aggregates.apply_deltas(db, user_id, profile_aggregates.behavioral_deltas(db_responses))
+    return db_responses
+
+def _add_technical(db: Session, user_id: int, attempts: List[schemas.TechnicalAttemptCreate]):
+    db_attempts = [
+        models.TechnicalAttempt(
+            user_id=user_id,
+            question_id=attempt.question_id,
+            selected_answer=attempt.selected_answer,
+            correct_answer=attempt.correct_answer,
+            response_time=attempt.response_time,
+            is_correct=attempt.is_correct,
+            attempt_number=attempt.attempt_number
+        )
+        for attempt in attempts
+    ]
+    db.add_all(db_attempts)
+    db.flush()
+    profile_aggregates.apply_deltas(db, user_id, profile_aggregates.technical_deltas(db_attempts))
+    return db_attempts
+
+def _commit_rows(db: Session, add_rows, user_id: int, items: list):
+    rows = add_rows(db, user_id, items)
+    # commits the rows and triggers the profile update; the session does not
+    # expire on commit, so the flushed rows serialize without being re-selected
+    refresh_profile(user_id, db)
+    return rows
+
+def _refresh_profiles(db: Session, user_ids):
+    for user_id in user_ids:
+        refresh_profile(user_id, db)
+
+# Optional single writer that commits many submissions per transaction (GROUP_COMMIT=1)
+submission_writer = GroupCommitWriter(
+    database.GroupCommitSession,
+    after_commit=_refresh_profiles,
+    max_delay=config.GROUP_COMMIT_MAX_DELAY_MS / 1000.0,
+    max_batch_rows=config.GROUP_COMMIT_MAX_BATCH_ROWS,
+    max_pending_rows=config.GROUP_COMMIT_MAX_PENDING_ROWS,
+) if config.GROUP_COMMIT else None
+
+async def _store(db, add_rows, user_id: int, items: list):
+    if submission_writer is not None:
+        return await submission_writer.submit_async(add_rows, user_id, items, key=user_id, rows=len(items))
+    return await db.run_sync(_commit_rows, add_rows, user_id, items)
+
 @router.post("/behavioral", response_model=schemas.BehavioralResponseResponse)
-def submit_behavioral_response(
-    response: schemas.BehavioralResponseCreate, 
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+async def submit_behavioral_response(
+    response: schemas.BehavioralResponseCreate,
+    db=Depends(database.get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    db_response = models.BehavioralResponse(
-        user_id=current_user.id,
-        question_id=response.question_id,
-        selected_option=response.selected_option,
-        score_weight=response.score_weight
-    )
-    db.add(db_response)
-    db.commit()
-    db.refresh(db_response)
-    # trigger profile update implicitly or explicitly
-    update_cognitive_profile(current_user.id, db)
-    return db_response
+    rows = await _store(db, _add_behavioral, current_user.id, [response])
+    return fast_json.response(schemas.BehavioralResponseResponse, rows[0])
 
 @router.post("/technical", response_model=schemas.TechnicalAttemptResponse)
-def submit_technical_attempt(
-    attempt: schemas.TechnicalAttemptCreate, 
-    db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+async def submit_technical_attempt(
+    attempt: schemas.TechnicalAttemptCreate,
+    db=Depends(database.get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    db_attempt = models.TechnicalAttempt(
-        user_id=current_user.id,
-        question_id=attempt.question_id,
-        selected_answer=attempt.selected_answer,
-        correct_answer=attempt.correct_answer,
-        response_time=attempt.response_time,
-        is_correct=attempt.is_correct,
-        attempt_number=attempt.attempt_number
-    )
-    db.add(db_attempt)
-    db.commit()
-    db.refresh(db_attempt)
-    # trigger profile update
-    update_cognitive_profile(current_user.id, db)
-    return db_attempt
+    rows = await _store(db, _add_technical, current_user.id, [attempt])
+    return fast_json.response(schemas.TechnicalAttemptResponse, rows[0])
 
+
+# A full test is 10-15 questions plus retries; anything far beyond that is not a test submission.
+MAX_BATCH_SIZE = 200
+
+def _check_batch_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"Batch exceeds {MAX_BATCH_SIZE} items")
+
+@router.post("/behavioral/batch", response_model=List[schemas.BehavioralResponseResponse])
+async def submit_behavioral_batch(
+    batch: schemas.BehavioralResponseBatch,
+    db=Depends(database.get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    _check_batch_size(batch.responses)
+    rows = await _store(db, _add_behavioral, current_user.id, batch.responses)
+    return fast_json.response(schemas.BehavioralResponseResponse, rows)
+
+@router.post("/technical/batch", response_model=List[schemas.TechnicalAttemptResponse])
+async def submit_technical_batch(
+    batch: schemas.TechnicalAttemptBatch,
+    db=Depends(database.get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    _check_batch_size(batch.attempts)
+    rows = await _store(db, _add_technical, current_user.id, batch.attempts)
+    return fast_json.response(schemas.TechnicalAttemptResponse, rows)
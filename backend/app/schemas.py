@@ -1,3 +1,4 @@
+from enum import Enum
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from datetime import datetime
@@ -31,9 +32,13 @@ class BehavioralResponseCreate(BaseModel):
 class BehavioralResponseResponse(BehavioralResponseCreate):
     id: int
     user_id: int
+    created_at: Optional[datetime] = None
     class Config:
         orm_mode = True
 
+class BehavioralResponseBatch(BaseModel):
+    responses: List[BehavioralResponseCreate]
+
 class TechnicalAttemptCreate(BaseModel):
     question_id: int
     selected_answer: str
@@ -45,9 +50,13 @@ class TechnicalAttemptCreate(BaseModel):
 class TechnicalAttemptResponse(TechnicalAttemptCreate):
     id: int
     user_id: int
+    created_at: Optional[datetime] = None
     class Config:
         orm_mode = True
 
+class TechnicalAttemptBatch(BaseModel):
+    attempts: List[TechnicalAttemptCreate]
+
 class CognitiveProfileBase(BaseModel):
     behavioral_score: float
     technical_score: float
@@ -59,6 +68,7 @@ class CognitiveProfileResponse(CognitiveProfileBase):
     id: int
     user_id: int
     last_updated: datetime
+    is_stale: bool = False
     class Config:
         orm_mode = True
 
@@ -79,6 +89,15 @@ class ModuleResponse(ModuleBase):
     class Config:
         orm_mode = True
 
+class ModuleSummaryResponse(BaseModel):
+    id: int
+    course_id: int
+    title: str
+    video_url: Optional[str] = None
+    order: int
+    class Config:
+        orm_mode = True
+
 class QuestionBase(BaseModel):
     text: str
     options: str
@@ -88,6 +107,7 @@ class QuestionBase(BaseModel):
 class QuestionResponse(QuestionBase):
     id: int
     quiz_id: int
+    choices: List[str] = []
     class Config:
         orm_mode = True
 
@@ -117,3 +137,50 @@ class CourseResponse(CourseBase):
     quiz: Optional[QuizResponse] = None
     class Config:
         orm_mode = True
+
+class CourseSummaryResponse(CourseBase):
+    id: int
+    modules: List[ModuleSummaryResponse] = []
+    class Config:
+        orm_mode = True
+
+class CourseCompletionCreate(BaseModel):
+    quiz_score: Optional[int] = None
+
+class CourseCompletionResponse(BaseModel):
+    course_id: int
+    quiz_score: Optional[int] = None
+    completed_at: datetime
+    class Config:
+        orm_mode = True
+
+class QuizAnswer(BaseModel):
+    question_id: int
+    selected_answer: str
+
+class QuizSubmission(BaseModel):
+    answers: List[QuizAnswer]
+    complete: bool = False  # also record the course as completed with the graded score
+
+class QuestionGrade(BaseModel):
+    question_id: int
+    selected_answer: str
+    is_correct: bool
+    correct_answer: str
+    explanation: Optional[str] = None
+
+class QuizGradeResponse(BaseModel):
+    course_id: int
+    quiz_id: int
+    score: int
+    total: int
+    results: List[QuestionGrade]
+    completion: Optional[CourseCompletionResponse] = None
+
+class CourseFields(str, Enum):
+    full = "full"
+    summary = "summary"
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
@@ -0,0 +1,79 @@
+"""Production launcher: prepare the database once, then run N uvicorn workers.
+
+``uvicorn app.main:app --workers N`` would have every worker migrate and seed at
+the same moment. Here the parent process runs migrations and the catalog sync once
+(under the startup file lock, so concurrent launchers are safe too), then starts the
+workers with ``STARTUP_PREPARED=1``: they skip every startup write and only warm
+their caches (catalog pages, answer keys, recommendation index).
+
+Graceful restart (POSIX): ``kill -HUP <parent pid>`` re-runs the migrations and
+catalog sync, then replaces the workers one at a time, each new worker serving before
+the old one is stopped. SIGTTIN / SIGTTOU add or remove a worker; SIGTERM / SIGINT
+drain in-flight requests for up to SERVER_GRACEFUL_TIMEOUT_SECONDS and exit.
+
+    python -m app.serve [--host 0.0.0.0] [--port 8000] [--workers 4]
+"""
+import argparse
+import inspect
+import logging
+import os
+import sys
+
+from . import config, startup
+from .database import engine
+
+logger = logging.getLogger("uvicorn.error")
+
+def _supervisor(uvicorn_config, sockets):
+    from uvicorn import Server
+    from uvicorn.supervisors import Multiprocess
+
+    class Supervisor(Multiprocess):
+        def handle_hup(self):
+            # Schema and catalog changes are applied once, by the parent, before the
+            # replacement workers start
+            logger.info("Received SIGHUP, preparing the database before restarting workers.")
+            try:
+                startup.prepare()
+            except Exception as e:
+                logger.error(f"Startup preparation failed, keeping the current workers: {e}")
+                return
+            super().handle_hup()
+
+    # Older uvicorn releases take the worker entry point explicitly
+    if "target" in inspect.signature(Multiprocess.__init__).parameters:
+        return Supervisor(uvicorn_config, target=Server(config=uvicorn_config).run, sockets=sockets)
+    return Supervisor(uvicorn_config, sockets=sockets)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prepare the database once, then serve the API with several workers.")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS,
+                        help=f"worker processes (default: WEB_CONCURRENCY or {config.SERVER_WORKERS})")
+    parser.add_argument("--graceful-timeout", type=int, default=config.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+                        help="seconds a stopping worker may spend finishing in-flight requests")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    import uvicorn
+
+    startup.prepare()
+    # Workers are separate processes with their own pools; never hand them ours
+    engine.dispose()
+    os.environ["STARTUP_PREPARED"] = "1"
+
+    uvicorn_config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    sock = uvicorn_config.bind_socket()
+    _supervisor(uvicorn_config, [sock]).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""One-time startup work (schema migrations, catalog sync) and read-only cache warming.
+
+Migrations and the content sync write to the database, so with several workers they
+must not run concurrently. ``prepare()`` runs them under an exclusive file lock
+(``STARTUP_LOCK_PATH``); later callers wait for it and find nothing left to do. The
+production launcher (app/serve.py) calls it once before starting the workers and sets
+``STARTUP_PREPARED=1`` for them, so workers only warm their in-memory caches.
+"""
+import contextlib
+import os
+import time
+import traceback
+
+from sqlalchemy.orm import Session
+
+from . import config, content_sync, migrations, models
+from .answer_keys import answer_key_cache
+from .catalog_cache import catalog_cache
+from .database import SessionLocal, engine, get_read_sessionmaker
+from .recommendation_index import recommendation_cache
+from .routes.course_routes import cached_course_list, cached_course_payload
+from .schemas import CourseFields
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    """Exclusive advisory lock on ``path`` held for the duration of the block (blocking)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s; keep waiting
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def seed_data():
+    db = SessionLocal()
+    try:
+        # Applies only what changed in app/seed_content.py; a no-op when the hash matches
+        content_sync.sync_content(db)
+    except Exception as e:
+        print(f"Seeding error: {e}")
+        traceback.print_exc()
+    finally:
+        db.close()
+
+def upgrade_schema():
+    """Creates missing tables and upgrades existing databases (indexes, columns)."""
+    with file_lock(config.STARTUP_LOCK_PATH):
+        migrations.upgrade(engine)
+
+def seed_catalog():
+    with file_lock(config.STARTUP_LOCK_PATH):
+        seed_data()
+
+def prepare():
+    """Migrations and catalog sync, once, under the startup lock."""
+    start = time.perf_counter()
+    with file_lock(config.STARTUP_LOCK_PATH):
+        migrations.upgrade(engine)
+        seed_data()
+    print(f"Database prepared in {time.perf_counter() - start:.2f}s.")
+
+def _warm(db: Session) -> int:
+    version = catalog_cache.version
+    for fields in CourseFields:
+        cached_course_list(db, fields)
+    course_ids = [course_id for course_id, in db.query(models.Course.id).order_by(models.Course.id)]
+    for course_id in course_ids:
+        cached_course_payload(db, course_id)
+    answer_key_cache.index(db, version)
+    recommendation_cache.index(db, version)
+    return len(course_ids)
+
+def warm_caches():
+    """Render the catalog and build the answer-key and recommendation indexes. Reads only."""
+    start = time.perf_counter()
+    db = get_read_sessionmaker()()
+    try:
+        # Record the current sync state, so later syncs by other processes are noticed
+        catalog_cache.check()
+        courses = _warm(db)
+    except Exception as e:
+        # A cold cache is only slower; never fail startup over it
+        print(f"Cache warm-up failed: {e}")
+        traceback.print_exc()
+        return
+    finally:
+        db.close()
+    print(f"Caches warmed ({courses} courses) in {time.perf_counter() - start:.2f}s.")
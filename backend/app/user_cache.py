@@ -0,0 +1,49 @@
+"""Cache of authenticated users, keyed by token subject (email).
+
+``get_current_user`` runs on every authenticated request; caching an immutable
+snapshot of the user row skips the SELECT on ``users`` for repeat requests. Entries
+expire after ``USER_CACHE_TTL_SECONDS`` and are dropped as soon as the user row is
+updated or deleted through the ORM.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect
+
+from . import config, models
+from .cache import TTLCache
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Detached, read-only copy of a User row; safe to share across sessions and threads."""
+    id: int
+    name: str
+    email: str
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "UserSnapshot":
+        return cls(id=user.id, name=user.name, email=user.email, created_at=user.created_at)
+
+user_cache = TTLCache(maxsize=config.USER_CACHE_MAX_ENTRIES, ttl=config.USER_CACHE_TTL_SECONDS)
+
+def get(email: str) -> Optional[UserSnapshot]:
+    return user_cache.get(email)
+
+def put(user: models.User) -> UserSnapshot:
+    snapshot = UserSnapshot.from_user(user)
+    user_cache.put(snapshot.email, snapshot)
+    return snapshot
+
+def invalidate(email: str):
+    user_cache.pop(email)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    # Drop the old email too when it changed in this flush
+    history = inspect(target).attrs.email.history
+    for email in [target.email, *(history.deleted or ())]:
+        if email:
+            invalidate(email)
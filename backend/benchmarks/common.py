@@ -0,0 +1,57 @@
+"""Helpers shared by the benchmark scripts: latency summaries and baseline comparison."""
+import json
+import math
+import platform
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(latencies_s: List[float], elapsed_s: float, errors: int = 0) -> Dict[str, float]:
+    values = sorted(latencies_s)
+    ms = lambda v: round(v * 1000.0, 3)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+def environment() -> Dict[str, str]:
+    return {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+def save(path: str, results: dict):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Results written to {path}")
+
+def compare(results: dict, baseline: dict, threshold_pct: float, metric: str = "p95_ms") -> List[str]:
+    """Return a message per entry whose ``metric`` is more than threshold_pct worse than baseline.
+
+    Latency metrics (``*_ms``) regress upwards, throughput metrics downwards.
+    """
+    regressions = []
+    higher_is_worse = metric.endswith("_ms")
+    for name, current in results.get("endpoints", {}).items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous or not previous.get(metric):
+            continue
+        before, after = previous[metric], current[metric]
+        change = (after - before) / before * 100.0
+        if (change if higher_is_worse else -change) > threshold_pct:
+            regressions.append(f"{name}: {metric} {before} -> {after} ({change:+.1f}%)")
+    return regressions
@@ -0,0 +1,114 @@
+"""Write throughput of test submissions with and without group commit.
+
+Registers ``--users`` users, then posts ``--submissions`` single-answer behavioral
+responses (POST /tests/behavioral, one row per request: the worst case for per-request
+commits) with ``--concurrency`` requests in flight. Each mode runs in its own
+process, against its own fresh SQLite file, driven in-process through httpx's ASGI
+transport:
+
+    off   every request commits its own row (GROUP_COMMIT=0)
+    on    rows are committed in batches by the group-commit writer (GROUP_COMMIT=1)
+
+    python -m benchmarks.group_commit [--submissions 2000] [--concurrency 50] [--synchronous FULL]
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from benchmarks import common
+
+MODES = {"off": "0", "on": "1"}
+
+async def _post_all(client, headers, submissions: int, concurrency: int, latencies, errors):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        body = {"question_id": i % 10 + 1, "selected_option": "abcd"[i % 4], "score_weight": i % 10 + 1}
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/tests/behavioral", json=body, headers=headers[i % len(headers)])
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(submissions)))
+    return time.perf_counter() - start
+
+async def _run_mode(args) -> dict:
+    import httpx
+    from app.main import app
+    from app.routes import test_routes
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+            headers = []
+            for _ in range(args.users):
+                email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+                await client.post("/auth/register", json={"name": "bench", "email": email, "password": "bench-password"})
+                token = (await client.post("/auth/login", json={"email": email, "password": "bench-password"})).json()
+                headers.append({"Authorization": f"Bearer {token['access_token']}"})
+            latencies, errors = [], []
+            elapsed = await _post_all(client, headers, args.submissions, args.concurrency, latencies, errors)
+        writer = test_routes.submission_writer
+        result = dict(common.summarize(latencies, elapsed, len(errors)),
+                      rows_per_s=round(len(latencies) / elapsed, 1) if elapsed else 0.0)
+        if writer is not None:
+            result["writer"] = writer.stats()
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare submission throughput with and without group commit.")
+    parser.add_argument("--submissions", type=int, default=2000, help="single-row submissions per mode")
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in flight at once")
+    parser.add_argument("--users", type=int, default=20, help="users the submissions are spread over")
+    parser.add_argument("--synchronous", default=None, help="SQLITE_SYNCHRONOUS for both runs (e.g. FULL)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--mode", choices=sorted(MODES), help=argparse.SUPPRESS)  # internal: run one mode
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        print(json.dumps(asyncio.run(_run_mode(args))))
+        return 0
+
+    results = {"meta": dict(common.environment(), submissions=args.submissions, concurrency=args.concurrency,
+                            users=args.users, synchronous=args.synchronous or "default"), "endpoints": {}}
+    for mode, flag in MODES.items():
+        # Settings are read at import time, so each mode gets a fresh interpreter and database
+        env = dict(os.environ, GROUP_COMMIT=flag, BCRYPT_ROUNDS="4",
+                   DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='group-commit-'), 'bench.db')}")
+        env.pop("ASYNC_DATABASE_URL", None)
+        if args.synchronous:
+            env["SQLITE_SYNCHRONOUS"] = args.synchronous
+        cmd = [sys.executable, "-m", "benchmarks.group_commit", "--mode", mode, "--submissions", str(args.submissions),
+               "--concurrency", str(args.concurrency), "--users", str(args.users)]
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stdout + proc.stderr)
+            return 1
+        results["endpoints"][f"group commit {mode}"] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"\n{'mode':18s} {'rows/s':>9s} {'err':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for name, s in results["endpoints"].items():
+        print(f"{name:18s} {s['rows_per_s']:9.1f} {s['errors']:5d} {s['p50_ms']:9.1f} {s['p95_ms']:9.1f} {s['p99_ms']:9.1f}")
+    writer = results["endpoints"]["group commit on"].get("writer")
+    if writer:
+        print(f"\nwriter: {writer['batches']} batches, {writer['rows_per_batch']} rows/batch, "
+              f"largest {writer['largest_batch']}, rejected {writer['rejected']}")
+
+    if args.output:
+        common.save(args.output, results)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
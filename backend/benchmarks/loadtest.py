@@ -0,0 +1,221 @@
+"""HTTP load generator for the API.
+
+Each virtual user walks the same journey as the frontend:
+
+    register -> login -> /auth/me
+    behavioral test (one batch of 10 answers)
+    technical test (10 questions, wrong answers retried until correct, one batch)
+    dashboard (profile + recommended courses)
+    courses (summary list + profile), one course detail (+ profile)
+    analytics
+
+Without --url the app is imported and driven in-process through httpx's ASGI
+transport, against a fresh SQLite file unless --database-url is given. With --url
+it targets a running server, e.g. ``uvicorn app.main:app``.
+
+    python -m benchmarks.loadtest --users 100 --concurrency 20 --output results.json
+    python -m benchmarks.loadtest --baseline benchmarks/baseline.json --threshold 20
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --save-baseline benchmarks/baseline.json
+
+Requires httpx. Exits with status 1 when a baseline comparison finds a regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks import common
+
+BEHAVIORAL_QUESTIONS = 10
+BEHAVIORAL_SCORES = (1, 2, 3, 4, 5, 8, 10)
+TECHNICAL_QUESTIONS = 10
+TECHNICAL_OPTIONS = 4
+PASSWORD = "loadtest-password"
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.failed_journeys = 0
+
+    async def call(self, client, name: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except Exception as exc:
+            self.errors[name] += 1
+            raise RuntimeError(f"{name}: {exc!r}") from exc
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            raise RuntimeError(f"{name}: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+def _behavioral_answers(rng: random.Random):
+    return [
+        {"question_id": q, "selected_option": rng.choice("abcd"), "score_weight": rng.choice(BEHAVIORAL_SCORES)}
+        for q in range(1, BEHAVIORAL_QUESTIONS + 1)
+    ]
+
+def _technical_attempts(rng: random.Random):
+    attempts = []
+    for q in range(1, TECHNICAL_QUESTIONS + 1):
+        correct = f"option-{rng.randrange(TECHNICAL_OPTIONS)}"
+        wrong = [f"option-{i}" for i in range(TECHNICAL_OPTIONS) if f"option-{i}" != correct]
+        rng.shuffle(wrong)
+        # Like the UI: keep answering until correct, never repeating a wrong option
+        for attempt_number, selected in enumerate(wrong[:rng.randrange(TECHNICAL_OPTIONS)] + [correct], start=1):
+            attempts.append({
+                "question_id": q,
+                "selected_answer": selected,
+                "correct_answer": correct,
+                "response_time": round(rng.uniform(2.0, 30.0), 2),
+                "is_correct": selected == correct,
+                "attempt_number": attempt_number,
+            })
+    return attempts
+
+async def journey(client, rec: Recorder, rng: random.Random):
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    await rec.call(client, "POST /auth/register", "POST", "/auth/register",
+                   json={"name": "Load Test", "email": email, "password": PASSWORD})
+    token = (await rec.call(client, "POST /auth/login", "POST", "/auth/login",
+                            json={"email": email, "password": PASSWORD})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    await rec.call(client, "GET /auth/me", "GET", "/auth/me", headers=headers)
+
+    await rec.call(client, "POST /tests/behavioral/batch", "POST", "/tests/behavioral/batch",
+                   json={"responses": _behavioral_answers(rng)}, headers=headers)
+    await rec.call(client, "POST /tests/technical/batch", "POST", "/tests/technical/batch",
+                   json={"attempts": _technical_attempts(rng)}, headers=headers)
+
+    # Pages fire their requests concurrently, as the frontend does
+    await asyncio.gather(
+        rec.call(client, "GET /recommendations/profile", "GET", "/recommendations/profile", headers=headers),
+        rec.call(client, "GET /recommendations/courses", "GET", "/recommendations/courses", headers=headers),
+    )
+    courses, _ = await asyncio.gather(
+        rec.call(client, "GET /courses/", "GET", "/courses/", params={"fields": "summary"}, headers=headers),
+        rec.call(client, "GET /recommendations/profile", "GET", "/recommendations/profile", headers=headers),
+    )
+    course_ids = [c["id"] for c in courses.json()]
+    if course_ids:
+        await asyncio.gather(
+            rec.call(client, "GET /courses/{id}", "GET", f"/courses/{rng.choice(course_ids)}", headers=headers),
+            rec.call(client, "GET /recommendations/profile", "GET", "/recommendations/profile", headers=headers),
+        )
+    await rec.call(client, "GET /analytics/performance", "GET", "/analytics/performance", headers=headers)
+
+async def run_load(client, users: int, concurrency: int, seed: int, rec: Recorder) -> float:
+    """Run ``users`` journeys with at most ``concurrency`` in flight. Returns elapsed seconds."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            try:
+                await journey(client, rec, random.Random(seed + i))
+            except RuntimeError as exc:
+                rec.failed_journeys += 1
+                if rec.failed_journeys <= 5:
+                    print(f"Journey {i} failed: {exc}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(users)))
+    return time.perf_counter() - start
+
+async def _run(args, rec: Recorder) -> float:
+    import httpx
+
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            return await run_load(client, args.users, args.concurrency, args.seed, rec)
+
+    from app.main import app
+    # ASGITransport does not send lifespan events, so run startup/shutdown explicitly
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            return await run_load(client, args.users, args.concurrency, args.seed, rec)
+
+def build_results(args, rec: Recorder, elapsed: float) -> dict:
+    endpoints = {
+        name: common.summarize(values, elapsed, rec.errors.get(name, 0))
+        for name, values in sorted(rec.latencies.items())
+    }
+    all_latencies = [v for values in rec.latencies.values() for v in values]
+    return {
+        "meta": dict(common.environment(), target=args.url or "in-process", users=args.users,
+                     concurrency=args.concurrency, seed=args.seed, elapsed_s=round(elapsed, 3)),
+        "total": dict(common.summarize(all_latencies, elapsed, sum(rec.errors.values())),
+                      journeys_per_s=round((args.users - rec.failed_journeys) / elapsed, 2) if elapsed else 0.0,
+                      failed_journeys=rec.failed_journeys),
+        "endpoints": endpoints,
+    }
+
+def print_report(results: dict):
+    print(f"\n{'endpoint':34s} {'count':>6s} {'err':>4s} {'rps':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+    for name, s in rows:
+        print(f"{name:34s} {s['count']:6d} {s['errors']:4d} {s['throughput_rps']:8.1f} "
+              f"{s['p50_ms']:9.1f} {s['p95_ms']:9.1f} {s['p99_ms']:9.1f}")
+    total = results["total"]
+    print(f"\n{total['journeys_per_s']} journeys/s, {total['failed_journeys']} failed, "
+          f"{results['meta']['elapsed_s']} s elapsed")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the API with simulated user journeys.")
+    parser.add_argument("--url", help="base URL of a running server; the app is run in-process when omitted")
+    parser.add_argument("--database-url", help="in-process only: database to use instead of a fresh temporary SQLite file")
+    parser.add_argument("--users", type=int, default=50, help="number of user journeys (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=10, help="journeys in flight at once (default: 10)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for generated answers")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write the results as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a baseline written by --save-baseline")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed regression in percent (default: 20)")
+    parser.add_argument("--metric", default="p95_ms", choices=("p50_ms", "p95_ms", "p99_ms", "mean_ms", "throughput_rps"),
+                        help="metric compared against the baseline (default: p95_ms)")
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        # Must be set before the app (and its engine) is imported
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+        else:
+            path = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "loadtest.db")
+            os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    rec = Recorder()
+    elapsed = asyncio.run(_run(args, rec))
+    results = build_results(args, rec, elapsed)
+    print_report(results)
+
+    if args.output:
+        common.save(args.output, results)
+    if args.save_baseline:
+        common.save(args.save_baseline, results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = common.compare(results, baseline, args.threshold, args.metric)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold}% ({args.metric}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold}% ({args.metric}) against {args.baseline}.")
+    return 1 if rec.failed_journeys else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
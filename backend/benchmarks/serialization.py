@@ -0,0 +1,118 @@
+"""Micro-benchmark: pydantic response validation vs. the fast JSON path.
+
+Serializes the seed catalog (as detached ORM objects, no database involved) as the
+course list and a single course detail in three ways:
+
+    pydantic      model_validate(from_attributes) + jsonable_encoder + json.dumps,
+                  i.e. what FastAPI does with a response_model (FAST_JSON=0)
+    fast-stdlib   fast_json.orm_to_dict + json.dumps
+    fast          fast_json.orm_to_dict + orjson (FAST_JSON=1, when orjson is installed)
+
+All paths are checked to produce the same JSON before timing.
+
+    python -m benchmarks.serialization [--copies 10] [--repeat 5] [--output serialization.json]
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app import fast_json, models, schemas
+from app.answer_keys import parse_options
+from app.seed_content import catalog_definition
+from benchmarks import common
+
+def build_courses(copies: int) -> List[models.Course]:
+    courses = []
+    next_id = {"course": 1, "module": 1, "quiz": 1, "question": 1}
+
+    def take(kind):
+        value = next_id[kind]
+        next_id[kind] += 1
+        return value
+
+    for copy in range(copies):
+        for data in catalog_definition():
+            course = models.Course(id=take("course"), title=f"{data['title']} #{copy}",
+                                   **{f: data.get(f) for f in ("description", "difficulty", "instructor", "image_url")})
+            course.modules = [models.Module(id=take("module"), course_id=course.id, **m) for m in data.get("modules", [])]
+            quiz_data = data.get("quiz")
+            if quiz_data:
+                quiz = models.Quiz(id=take("quiz"), course_id=course.id, title=quiz_data["title"])
+                quiz.questions = [models.Question(id=take("question"), quiz_id=quiz.id, choices=parse_options(q["options"]), **q)
+                                  for q in quiz_data["questions"]]
+                course.quiz = quiz
+            courses.append(course)
+    return courses
+
+def pydantic_path(schema, objs) -> bytes:
+    validated = [schema.model_validate(o, from_attributes=True) if hasattr(schema, "model_validate") else schema.from_orm(o)
+                 for o in objs]
+    return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode("utf-8")
+
+def fast_stdlib_path(schema, objs) -> bytes:
+    return json.dumps([fast_json.orm_to_dict(o, schema) for o in objs], separators=(",", ":")).encode("utf-8")
+
+def fast_path(schema, objs) -> bytes:
+    return fast_json.dumps([fast_json.orm_to_dict(o, schema) for o in objs])
+
+PATHS: Dict[str, Callable] = {"pydantic": pydantic_path, "fast-stdlib": fast_stdlib_path, "fast": fast_path}
+
+def bench(fn: Callable, repeat: int, min_time: float = 0.2) -> List[float]:
+    """Seconds per call for each of ``repeat`` rounds of at least ``min_time`` seconds."""
+    per_call = []
+    for _ in range(repeat):
+        n, start = 0, time.perf_counter()
+        while True:
+            fn()
+            n += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        per_call.append(elapsed / n)
+    return per_call
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare pydantic and fast JSON serialization of course responses.")
+    parser.add_argument("--copies", type=int, default=1, help="catalog copies in the course list (10 courses each)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds per case")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    courses = build_courses(args.copies)
+    cases = {
+        f"course list ({len(courses)} courses)": (schemas.CourseResponse, courses),
+        "course detail": (schemas.CourseResponse, courses[:1]),
+        f"course list summary ({len(courses)} courses)": (schemas.CourseSummaryResponse, courses),
+    }
+    print(f"orjson: {'yes' if fast_json.orjson is not None else 'no (fast path uses the stdlib encoder)'}")
+
+    results = {"meta": dict(common.environment(), copies=args.copies, orjson=fast_json.orjson is not None), "endpoints": {}}
+    for case, (schema, objs) in cases.items():
+        reference = json.loads(pydantic_path(schema, objs))
+        for name, fn in PATHS.items():
+            if json.loads(fn(schema, objs)) != reference:
+                print(f"{case}: {name} output differs from pydantic")
+                return 1
+        print(f"\n{case}")
+        baseline = None
+        for name, fn in PATHS.items():
+            timings = sorted(bench(lambda: fn(schema, objs), args.repeat))
+            best = timings[0]
+            baseline = baseline or best
+            results["endpoints"][f"{case} [{name}]"] = {
+                "best_us": round(best * 1e6, 2),
+                "median_us": round(timings[len(timings) // 2] * 1e6, 2),
+                "ops_per_s": round(1 / best, 1),
+            }
+            print(f"  {name:12s} {best * 1e6:10.1f} us/op  {1 / best:10.0f} ops/s  x{baseline / best:5.2f}")
+
+    if args.output:
+        common.save(args.output, results)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import uuid
+
+# Settings are read at import time: point the app at a throwaway database before
+# anything under app/ is imported, so tests never touch cognitive_analyzer.db
+_DATA_DIR = tempfile.mkdtemp(prefix="cognitive-analyzer-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATA_DIR, 'app.db')}"
+os.environ["STARTUP_LOCK_PATH"] = os.path.join(_DATA_DIR, ".startup.lock")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["ADMIN_EMAILS"] = "admin@example.com"
+for name in ("ASYNC_DATABASE_URL", "READ_DATABASE_URL", "ASYNC_READ_DATABASE_URL", "STARTUP_PREPARED"):
+    os.environ.pop(name, None)
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.database import Base, create_db_engine
+
+PASSWORD = "test-password"
+
+class FailingCommitSession(Session):
+    """Flushes, then fails the commit, as a full disk or lost connection would."""
+
+    def commit(self):
+        self.flush()
+        raise RuntimeError("disk I/O error")
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def user_id(engine) -> int:
+    """A user with one correct technical attempt and no aggregate or profile yet."""
+    from app import models
+
+    with Session(engine) as db:
+        user = models.User(name="learner", email="learner@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        db.add(models.TechnicalAttempt(user_id=user.id, question_id=1, selected_answer="a", correct_answer="a",
+                                       response_time=2.0, is_correct=True, attempt_number=1))
+        db.commit()
+        return user.id
+
+@pytest.fixture(scope="session")
+def client():
+    """The app against the throwaway database, migrated and seeded by its startup event."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+def login(client, email: str = None) -> dict:
+    email = email or f"user-{uuid.uuid4().hex[:12]}@example.com"
+    response = client.post("/auth/register", json={"name": "Test User", "email": email, "password": PASSWORD})
+    assert response.status_code in (200, 400), response.text  # 400: already registered
+    response = client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def headers(client) -> dict:
+    """Authorization headers for a newly registered user."""
+    return login(client)
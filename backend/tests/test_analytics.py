@@ -0,0 +1,48 @@
+from datetime import date
+
+from app import database, models
+
+def _user_id(client, headers) -> int:
+    return client.get("/auth/me", headers=headers).json()["id"]
+
+def _attempts(outcomes, start_time: float = 1.0) -> dict:
+    return {"attempts": [{"question_id": i + 1, "selected_answer": "a", "correct_answer": "a" if ok else "b",
+                          "response_time": start_time + i, "is_correct": ok, "attempt_number": 1}
+                         for i, ok in enumerate(outcomes)]}
+
+def test_performance_totals_are_rollups_plus_raw_tail(client, headers):
+    user_id = _user_id(client, headers)
+    with database.SessionLocal() as db:
+        # Compacted history: 10 attempts (4 correct) and 6 responses over two days
+        db.add_all([
+            models.DailyRollup(user_id=user_id, day=date(2026, 1, 1), behavioral_count=4, behavioral_weight_sum=20.0,
+                               technical_count=6, correct_count=3, response_time_sum=30.0, attempt_number_sum=6),
+            models.DailyRollup(user_id=user_id, day=date(2026, 1, 2), behavioral_count=2, behavioral_weight_sum=8.0,
+                               technical_count=4, correct_count=1, response_time_sum=20.0, attempt_number_sum=4),
+        ])
+        db.commit()
+    outcomes = [True, False, True, True, False]
+    assert client.post("/tests/technical/batch", json=_attempts(outcomes), headers=headers).status_code == 200
+    behavioral = {"responses": [{"question_id": 1, "selected_option": "a", "score_weight": 5}]}
+    assert client.post("/tests/behavioral/batch", json=behavioral, headers=headers).status_code == 200
+
+    body = client.get("/analytics/performance", params={"window": 3}, headers=headers).json()
+    assert body["total_attempts"] == 10 + 5
+    assert body["total_behavioral_responses"] == 6 + 1
+
+    # Only the last three raw attempts, numbered after everything before them
+    assert [point["attempt"] for point in body["accuracy_trend"]] == [13, 14, 15]
+    assert [point["time"] for point in body["response_time_trend"]] == [3.0, 4.0, 5.0]
+    # Running accuracy counts the rolled-up correct attempts too: 4 rolled up + 1 raw before the window
+    correct = 4 + 1
+    expected = []
+    for number, ok in zip((13, 14, 15), outcomes[2:]):
+        correct += ok
+        expected.append(round(correct / number * 100, 2))
+    assert [point["accuracy"] for point in body["accuracy_trend"]] == expected
+
+def test_performance_window_larger_than_history(client, headers):
+    assert client.post("/tests/technical/batch", json=_attempts([True, True]), headers=headers).status_code == 200
+    body = client.get("/analytics/performance", params={"window": 50}, headers=headers).json()
+    assert body["total_attempts"] == 2
+    assert [point["accuracy"] for point in body["accuracy_trend"]] == [100.0, 100.0]
@@ -0,0 +1,25 @@
+import time
+
+from app.catalog_cache import CatalogCache
+
+def test_sync_by_another_process_bumps_version():
+    stamps = ["hash-1"]
+    cache = CatalogCache(max_courses=4, max_lists=4, stamp=lambda: stamps[-1], check_interval=60.0)
+    assert not cache.check()  # first read only records the stamp
+    cache.put_course(1, b"old", cache.version)
+
+    stamps.append("hash-2")
+    assert cache.check()
+    assert cache.get_course(1) is None
+    assert not cache.check()
+
+def test_version_read_polls_in_background():
+    stamps = ["hash-1"]
+    cache = CatalogCache(max_courses=4, max_lists=4, stamp=lambda: stamps[-1], check_interval=0.01)
+    cache.check()
+    version = cache.version
+    stamps.append("hash-2")
+    deadline = time.monotonic() + 5
+    while cache.version == version and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert cache.version == version + 1
@@ -0,0 +1,37 @@
+from sqlalchemy.orm import Session
+
+from app import cohort_stats, models, profile_aggregates
+
+def add_user(db: Session, email: str) -> int:
+    user = models.User(name="learner", email=email, password_hash="x")
+    db.add(user)
+    db.flush()
+    return user.id
+
+def add_attempt(db: Session, user_id: int, is_correct: bool, response_time: float):
+    db.add(models.TechnicalAttempt(user_id=user_id, question_id=1, selected_answer="a",
+                                   correct_answer="a" if is_correct else "b", response_time=response_time,
+                                   is_correct=is_correct, attempt_number=1))
+
+def test_users_without_aggregate_rows_are_counted_from_history(engine, user_id):
+    with Session(engine) as db:
+        # user_id: one correct 2s attempt, no aggregate row
+        scanned = add_user(db, "scanned@example.com")
+        add_attempt(db, scanned, is_correct=False, response_time=12.0)
+        add_attempt(db, scanned, is_correct=True, response_time=8.0)
+        db.add(models.BehavioralResponse(user_id=scanned, question_id=1, selected_option="a", score_weight=5.0))
+        aggregated = add_user(db, "aggregated@example.com")
+        db.add(models.ProfileAggregate(user_id=aggregated, version=1, profile_version=0,
+                                       **dict(profile_aggregates._empty(), technical_count=4, correct_count=1,
+                                              response_time_sum=100.0)))
+        add_user(db, "new@example.com")  # no history at all: not part of the cohort
+        db.commit()
+
+        # batch_size=1 so the fallback runs over more than one batch of users
+        snapshot = cohort_stats.compute_snapshot(db, batch_size=1)
+
+    assert snapshot.user_count == 3
+    assert snapshot.accuracy.tolist() == [25.0, 50.0, 100.0]
+    assert snapshot.response_time.tolist() == [2.0, 10.0, 25.0]
+    assert snapshot.behavioral.tolist() == [50.0]
+    assert sum(snapshot.response_time_histogram) == 3
@@ -0,0 +1,88 @@
+import copy
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import content_sync, models
+from app.catalog_cache import catalog_cache
+
+CATALOG = [
+    {
+        "title": "Algorithms", "description": "Sorting and searching", "difficulty": "Beginner",
+        "instructor": "Ada", "image_url": None,
+        "modules": [
+            {"title": "Sorting", "content_theoretical": "Merge sort", "content_practical": "Sort a list",
+             "content_visual": "Diagram", "video_url": None, "order": 1},
+            {"title": "Searching", "content_theoretical": "Binary search", "content_practical": "Find a key",
+             "content_visual": "Diagram", "video_url": None, "order": 2},
+        ],
+        "quiz": {"title": "Algorithms quiz", "questions": [
+            {"text": "Fastest sort?", "options": "Bubble, Merge", "correct_answer": "Merge", "explanation": ""},
+        ]},
+    },
+    {
+        "title": "Databases", "description": "Tables and indexes", "difficulty": "Intermediate",
+        "instructor": "Edgar", "image_url": None,
+        "modules": [
+            {"title": "Indexes", "content_theoretical": "B-trees", "content_practical": "Add an index",
+             "content_visual": "Diagram", "video_url": None, "order": 1},
+        ],
+        "quiz": None,
+    },
+]
+
+@pytest.fixture
+def bumps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(catalog_cache, "bump_version", lambda: calls.append(1))
+    return calls
+
+def _module_ids(db: Session) -> dict:
+    return {(m.course.title, m.order): m.id for m in db.query(models.Module)}
+
+def test_second_sync_changes_nothing(engine, bumps):
+    with Session(engine) as db:
+        assert content_sync.sync_content(db, copy.deepcopy(CATALOG))
+        assert bumps == [1]
+        ids = _module_ids(db)
+
+        # Unchanged definition: skipped on the hash alone
+        assert not content_sync.sync_content(db, copy.deepcopy(CATALOG))
+        assert bumps == [1]
+        # Even a forced diff finds nothing to write
+        assert content_sync._apply(db, copy.deepcopy(CATALOG)) == {"inserted": 0, "updated": 0, "deleted": 0}
+        db.rollback()
+        assert _module_ids(db) == ids
+        assert db.query(models.Course).count() == 2
+        assert db.query(models.Question).count() == 1
+
+def test_edited_module_is_updated_in_place(engine, bumps):
+    with Session(engine) as db:
+        content_sync.sync_content(db, copy.deepcopy(CATALOG))
+        ids = _module_ids(db)
+
+        edited = copy.deepcopy(CATALOG)
+        edited[0]["modules"][1]["content_theoretical"] = "Binary search, revisited"
+        assert content_sync.sync_content(db, edited)
+        assert bumps == [1, 1]
+
+        assert _module_ids(db) == ids
+        module = db.get(models.Module, ids[("Algorithms", 2)])
+        assert module.content_theoretical == "Binary search, revisited"
+
+def test_removed_and_added_rows(engine, bumps):
+    with Session(engine) as db:
+        content_sync.sync_content(db, copy.deepcopy(CATALOG))
+        course_ids = {c.title: c.id for c in db.query(models.Course)}
+
+        edited = copy.deepcopy(CATALOG)
+        del edited[0]["modules"][0]
+        edited[1]["quiz"] = {"title": "Databases quiz", "questions": [
+            {"text": "What speeds up lookups?", "options": "Index, Trigger", "correct_answer": "Index",
+             "explanation": ""},
+        ]}
+        counts = content_sync._apply(db, edited)
+        db.commit()
+        assert counts == {"inserted": 2, "updated": 0, "deleted": 1}  # quiz + question in, module out
+        assert {c.title: c.id for c in db.query(models.Course)} == course_ids
+        assert sorted(_module_ids(db)) == [("Algorithms", 2), ("Databases", 1)]
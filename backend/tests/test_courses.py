@@ -0,0 +1,61 @@
+from app.routes.course_routes import MAX_PAGE_SIZE
+
+def _all_ids(client) -> list:
+    return [course["id"] for course in client.get("/courses/").json()]
+
+def test_keyset_pages_cover_the_catalog_once(client):
+    expected = _all_ids(client)
+    assert len(expected) > 3
+    seen, after, pages = [], None, 0
+    while True:
+        params = {"limit": 3} if after is None else {"limit": 3, "after": after}
+        response = client.get("/courses/", params=params)
+        assert response.status_code == 200
+        page = [course["id"] for course in response.json()]
+        assert 0 < len(page) <= 3
+        seen.extend(page)
+        pages += 1
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+        assert int(after) == page[-1]
+    assert seen == expected
+    assert pages == -(-len(expected) // 3)
+
+def test_last_page_has_no_cursor(client):
+    ids = _all_ids(client)
+    response = client.get("/courses/", params={"limit": len(ids)})
+    assert "X-Next-Cursor" not in response.headers
+    response = client.get("/courses/", params={"limit": 2, "after": ids[-3]})
+    assert [course["id"] for course in response.json()] == ids[-2:]
+    assert "X-Next-Cursor" not in response.headers
+    assert client.get("/courses/", params={"after": ids[-1]}).json() == []
+
+def test_limit_bounds(client):
+    assert client.get("/courses/", params={"limit": 0}).status_code == 422
+    assert client.get("/courses/", params={"limit": MAX_PAGE_SIZE + 1}).status_code == 422
+
+def test_difficulty_filter(client):
+    courses = client.get("/courses/").json()
+    difficulty = courses[0]["difficulty"]
+    filtered = client.get("/courses/", params={"difficulty": difficulty}).json()
+    assert filtered
+    assert {course["difficulty"] for course in filtered} == {difficulty}
+    assert [c["id"] for c in filtered] == [c["id"] for c in courses if c["difficulty"] == difficulty]
+    assert client.get("/courses/", params={"difficulty": "Nonexistent"}).json() == []
+
+def test_summary_leaves_out_module_text(client):
+    full = client.get("/courses/").json()
+    summary = client.get("/courses/", params={"fields": "summary"}).json()
+    assert [c["id"] for c in summary] == [c["id"] for c in full]
+    assert any(course["modules"] for course in summary)
+    for course in summary:
+        assert "quiz" not in course
+        for module in course["modules"]:
+            assert set(module) == {"id", "course_id", "title", "video_url", "order"}
+    assert any("content_theoretical" in module for course in full for module in course["modules"])
+
+def test_openapi_documents_both_list_shapes(client):
+    schema = client.get("/openapi.json").json()["paths"]["/courses/"]["get"]["responses"]["200"]
+    refs = str(schema["content"]["application/json"]["schema"])
+    assert "CourseResponse" in refs and "CourseSummaryResponse" in refs
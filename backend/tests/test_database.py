@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import config, database, models
+from app.database import begin_snapshot
+
+def _count_attempts(db: Session) -> int:
+    return db.query(models.TechnicalAttempt).count()
+
+def test_snapshot_ignores_later_commits(engine):
+    with Session(engine) as reader:
+        begin_snapshot(reader)
+        assert _count_attempts(reader) == 0
+        with Session(engine) as writer:
+            writer.add(models.TechnicalAttempt(user_id=1, question_id=1, selected_answer="a", correct_answer="a",
+                                               response_time=1.0, is_correct=True, attempt_number=1))
+            writer.commit()
+        assert _count_attempts(reader) == 0
+    with Session(engine) as reader:
+        assert _count_attempts(reader) == 1
+
+def _insert_attempt(engine):
+    with Session(engine) as db:
+        db.add(models.TechnicalAttempt(user_id=1, question_id=1, selected_answer="a", correct_answer="a",
+                                       response_time=1.0, is_correct=True, attempt_number=1))
+        db.commit()
+
+def test_read_engine_rejects_writes(engine):
+    url = database.read_url(engine.url.render_as_string(hide_password=False))
+    assert make_url(url).query["mode"] == "ro"
+    _insert_attempt(engine)
+    # Opened read-only (mode=ro) and, separately, query_only on a read-write file URL
+    for read_engine in (database.create_db_engine(url, read_only=True),
+                        database.create_db_engine(str(engine.url), read_only=True)):
+        try:
+            with read_engine.connect() as conn:
+                assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+            with Session(read_engine) as reader:
+                assert _count_attempts(reader) == 1
+            with pytest.raises(OperationalError, match="readonly"):
+                _insert_attempt(read_engine)
+        finally:
+            read_engine.dispose()
+    with Session(engine) as db:
+        assert _count_attempts(db) == 1
+
+def test_read_routing_off_uses_the_primary_engine(monkeypatch):
+    monkeypatch.setattr(config, "DB_READ_ROUTING", False)
+    monkeypatch.setattr(database, "read_engine", None)
+    monkeypatch.setattr(database, "ReadSessionLocal", None)
+    assert database.read_url(database.SQLALCHEMY_DATABASE_URL) is None
+    assert database.get_read_sessionmaker() is database.SessionLocal
+    assert database.get_read_engine() is database.engine
@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import exports, models
+
+def add_attempts(engine, user_id: int, count: int):
+    with Session(engine) as db:
+        db.add_all(models.TechnicalAttempt(user_id=user_id, question_id=i, selected_answer="a, b",
+                                           correct_answer='say "a"', response_time=i + 0.5, is_correct=i % 2 == 0,
+                                           attempt_number=1, created_at=datetime(2026, 1, i + 1, 12, 0))
+                   for i in range(count))
+        db.commit()
+
+def stored(engine) -> list:
+    table = models.TechnicalAttempt.__table__
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(table.select().order_by(table.c.id))]
+
+def test_export_stops_at_the_watermark_taken_at_start(engine, user_id):
+    add_attempts(engine, user_id, 3)
+    max_id, chunks = exports.stream(engine, "technical_attempts", "ndjson", exports.ExportFilter(), batch_size=1)
+    assert max_id == 4
+    # Committed after the watermark was taken (and reported) but before the body is read
+    add_attempts(engine, user_id, 1)
+    lines = b"".join(chunks).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3, 4]
+
+    # The next increment starts after the watermark and picks the new row up
+    max_id, chunks = exports.stream(engine, "technical_attempts", "ndjson", exports.ExportFilter(after_id=max_id))
+    assert max_id == 5
+    assert [json.loads(line)["id"] for line in b"".join(chunks).splitlines()] == [5]
+
+def test_ndjson_round_trips(engine, user_id):
+    add_attempts(engine, user_id, 3)
+    _, chunks = exports.stream(engine, "technical_attempts", "ndjson", exports.ExportFilter(), batch_size=2)
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    for row in rows:
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    assert rows == stored(engine)
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_csv_round_trips(engine, user_id, compress):
+    add_attempts(engine, user_id, 3)
+    _, chunks = exports.stream(engine, "technical_attempts", "csv", exports.ExportFilter(), compress=compress,
+                               batch_size=2)
+    body = b"".join(chunks)
+    if compress:
+        body = gzip.decompress(body)
+    rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+    expected = stored(engine)
+    assert list(rows[0]) == [c.name for c in exports.EXPORTS["technical_attempts"].columns]
+    assert rows == [{name: str(exports._csv_value(value)) for name, value in row.items()} for row in expected]
+    assert rows[1]["selected_answer"] == "a, b" and rows[1]["correct_answer"] == 'say "a"'
+
+def test_empty_export(engine):
+    max_id, chunks = exports.stream(engine, "technical_attempts", "csv", exports.ExportFilter(after_id=100))
+    assert max_id is None
+    assert b"".join(chunks).decode("utf-8").splitlines() == [
+        ",".join(c.name for c in exports.EXPORTS["technical_attempts"].columns)
+    ]
@@ -0,0 +1,91 @@
+import copy
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app import content_sync, models, schemas
+from app.routes.course_routes import _grade_quiz
+
+def course(title: str, questions: list) -> dict:
+    return {
+        "title": title, "description": title, "difficulty": "Beginner", "instructor": "Ada", "image_url": None,
+        "modules": [],
+        "quiz": {"title": f"{title} quiz", "questions": [
+            {"text": text, "options": options, "correct_answer": correct, "explanation": f"Because {correct}"}
+            for text, options, correct in questions
+        ]},
+    }
+
+CATALOG = [
+    course("Algorithms", [("Fastest sort?", "Bubble sort, Merge sort", "Merge sort"),
+                          ("Search a sorted list?", "Linear, Binary", "Binary")]),
+    course("Databases", [("Speeds up lookups?", "Index, View", "Index")]),
+]
+
+@pytest.fixture
+def catalog(engine) -> dict:
+    """Syncs CATALOG; returns {course title: (course id, {question text: question id})}."""
+    with Session(engine) as db:
+        content_sync.sync_content(db, copy.deepcopy(CATALOG))
+        return {
+            c.title: (c.id, {q.text: q.id for q in c.quiz.questions})
+            for c in db.query(models.Course)
+        }
+
+def grade(engine, user_id: int, course_id: int, answers: dict, complete: bool = False) -> dict:
+    submission = schemas.QuizSubmission(
+        answers=[{"question_id": qid, "selected_answer": answer} for qid, answer in answers.items()],
+        complete=complete,
+    )
+    with Session(engine) as db:
+        return _grade_quiz(db, user_id, course_id, submission)
+
+def test_answers_are_compared_normalised(engine, user_id, catalog):
+    course_id, questions = catalog["Algorithms"]
+    result = grade(engine, user_id, course_id, {questions["Fastest sort?"]: "  MERGE   sort "})
+    assert (result["score"], result["total"]) == (1, 2)
+    by_id = {r["question_id"]: r for r in result["results"]}
+    assert by_id[questions["Fastest sort?"]]["is_correct"]
+    assert by_id[questions["Fastest sort?"]]["correct_answer"] == "Merge sort"
+    # Unanswered questions count as wrong
+    assert by_id[questions["Search a sorted list?"]] == {
+        "question_id": questions["Search a sorted list?"], "selected_answer": "", "is_correct": False,
+        "correct_answer": "Binary", "explanation": "Because Binary",
+    }
+    assert result["completion"] is None
+
+def test_unknown_or_foreign_question_is_rejected(engine, user_id, catalog):
+    course_id, _ = catalog["Algorithms"]
+    _, other_questions = catalog["Databases"]
+    for question_id in (999, other_questions["Speeds up lookups?"]):
+        with pytest.raises(HTTPException) as exc:
+            grade(engine, user_id, course_id, {question_id: "Index"})
+        assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        grade(engine, user_id, 999, {})
+    assert exc.value.status_code == 404
+
+def test_complete_records_the_graded_score(engine, user_id, catalog):
+    course_id, questions = catalog["Algorithms"]
+    answers = {questions["Fastest sort?"]: "Merge sort", questions["Search a sorted list?"]: "Binary"}
+    result = grade(engine, user_id, course_id, answers, complete=True)
+    assert result["score"] == 2
+    assert result["completion"]["course_id"] == course_id
+    assert result["completion"]["quiz_score"] == 2
+    with Session(engine) as db:
+        completion = db.query(models.CourseCompletion).one()
+        assert (completion.user_id, completion.course_id, completion.quiz_score) == (user_id, course_id, 2)
+
+def test_content_sync_replaces_the_cached_answer_key(engine, user_id, catalog):
+    course_id, questions = catalog["Databases"]
+    question_id = questions["Speeds up lookups?"]
+    assert grade(engine, user_id, course_id, {question_id: "Index"})["score"] == 1
+
+    edited = copy.deepcopy(CATALOG)
+    edited[1]["quiz"]["questions"][0].update(options="Index, Cache", correct_answer="Cache")
+    with Session(engine) as db:
+        assert content_sync.sync_content(db, edited)
+
+    assert grade(engine, user_id, course_id, {question_id: "Index"})["score"] == 0
+    assert grade(engine, user_id, course_id, {question_id: "cache"})["score"] == 1
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import models
+from app.group_commit import GroupCommitWriter
+
+from conftest import FailingCommitSession
+
+def _statements(engine):
+    statements = []
+
+    @event.listens_for(engine, "connect")
+    def trace(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(lambda sql: statements.append(sql.strip().split()[0].upper()))
+
+    engine.dispose()  # new connections pick up the tracer
+    return statements
+
+def _add_user(db: Session, email: str):
+    db.query(models.User).filter(models.User.email == email).first()
+    user = models.User(name="writer", email=email, password_hash="x")
+    db.add(user)
+    db.flush()
+    return user.id
+
+def _count_users(engine) -> int:
+    with Session(engine) as db:
+        return db.query(func.count(models.User.id)).scalar()
+
+def test_batch_is_one_transaction(engine):
+    statements = _statements(engine)
+    writer = GroupCommitWriter(sessionmaker(bind=engine, expire_on_commit=False), max_delay=5.0, max_batch_rows=3)
+    futures = [writer.submit(_add_user, f"user{i}@example.com") for i in range(3)]
+    assert all(future.result(timeout=10) for future in futures)
+    writer.shutdown()
+
+    assert writer.stats()["batches"] == 1
+    assert statements.count("SAVEPOINT") == 3
+    assert statements.count("BEGIN") == 1
+    assert statements.count("COMMIT") == 1
+    assert _count_users(engine) == 3
+
+def test_failed_batch_commit_leaves_no_rows(engine):
+    writer = GroupCommitWriter(sessionmaker(bind=engine, class_=FailingCommitSession),
+                               max_delay=5.0, max_batch_rows=3)
+    futures = [writer.submit(_add_user, f"user{i}@example.com") for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=10)
+    writer.shutdown()
+
+    assert writer.stats()["failed"] == 3
+    assert _count_users(engine) == 0
@@ -0,0 +1,63 @@
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from app import http_cache
+
+BODY = b'{"courses": [' + b'{"title": "Intro"}, ' * 100 + b'{}]}'
+
+def request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+@pytest.fixture
+def payload(monkeypatch) -> http_cache.Payload:
+    # brotli is optional; stand in for it so both encodings exist
+    monkeypatch.setattr(http_cache, "brotli", SimpleNamespace(compress=lambda body: b"br:" + body))
+    return http_cache.Payload(BODY)
+
+def test_matching_if_none_match_is_not_modified(payload):
+    response = http_cache.respond(request(if_none_match=payload.etag), payload)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == payload.etag
+
+def test_stale_if_none_match_gets_the_body(payload):
+    response = http_cache.respond(request(if_none_match=http_cache.make_etag(b"old")), payload)
+    assert response.status_code == 200
+    assert response.body == BODY
+
+def test_etag_matches_weak_and_listed_validators(payload):
+    etag = payload.etag
+    assert http_cache.etag_matches(f"W/{etag}", etag)
+    assert http_cache.etag_matches(f'"other", W/{payload.variant_etag("gzip")}', etag)
+    assert http_cache.etag_matches(payload.variant_etag("br"), etag)
+    assert http_cache.etag_matches("*", etag)
+    assert not http_cache.etag_matches('"other", W/"another"', etag)
+    assert not http_cache.etag_matches(payload.variant_etag("deflate"), etag)
+
+def test_encoding_follows_accept_encoding(payload):
+    br = http_cache.respond(request(accept_encoding="gzip, br"), payload)
+    assert br.headers["Content-Encoding"] == "br"
+    assert br.headers["ETag"] == payload.variant_etag("br")
+    assert br.body == b"br:" + BODY
+
+    gzipped = http_cache.respond(request(accept_encoding="gzip, br;q=0"), payload)
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == payload.variant_etag("gzip")
+    assert gzip.decompress(gzipped.body) == BODY
+
+    identity = http_cache.respond(request(), payload)
+    assert "Content-Encoding" not in identity.headers
+    assert identity.headers["ETag"] == payload.etag
+    assert identity.headers["Vary"] == "Accept-Encoding"
+    assert identity.body == BODY
+
+def test_small_bodies_are_not_compressed():
+    payload = http_cache.Payload(b"{}")
+    response = http_cache.respond(request(accept_encoding="gzip"), payload)
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+    assert response.body == b"{}"
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app import migrations, models, profile_aggregates
+from app.database import create_db_engine
+
+# Schema of a database created before any migration existed (the baseline models)
+BASELINE_SCHEMA = """
+CREATE TABLE users (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR, email VARCHAR UNIQUE,
+                    password_hash VARCHAR, created_at DATETIME);
+CREATE TABLE courses (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR, description VARCHAR,
+                      difficulty VARCHAR, instructor VARCHAR, image_url VARCHAR);
+CREATE TABLE behavioral_responses (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER, question_id INTEGER,
+                                   selected_option VARCHAR, score_weight FLOAT);
+CREATE TABLE technical_attempts (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER, question_id INTEGER,
+                                 selected_answer VARCHAR, correct_answer VARCHAR, response_time FLOAT,
+                                 is_correct BOOLEAN, attempt_number INTEGER);
+CREATE TABLE cognitive_profiles (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER UNIQUE, behavioral_score FLOAT,
+                                 technical_score FLOAT, cognitive_level VARCHAR, learning_style VARCHAR,
+                                 recommended_strategy VARCHAR, last_updated DATETIME);
+CREATE TABLE modules (id INTEGER NOT NULL PRIMARY KEY, course_id INTEGER, title VARCHAR, content_theoretical VARCHAR,
+                      content_practical VARCHAR, content_visual VARCHAR, video_url VARCHAR, "order" INTEGER);
+CREATE TABLE quizzes (id INTEGER NOT NULL PRIMARY KEY, course_id INTEGER UNIQUE, title VARCHAR);
+CREATE TABLE questions (id INTEGER NOT NULL PRIMARY KEY, quiz_id INTEGER, text VARCHAR, options VARCHAR,
+                        correct_answer VARCHAR, explanation VARCHAR);
+INSERT INTO users (id, name, email, password_hash) VALUES (1, 'a', 'a@example.com', 'x'), (2, 'b', 'b@example.com', 'x'),
+                                                         (3, 'c', 'c@example.com', 'x');
+INSERT INTO behavioral_responses (user_id, question_id, selected_option, score_weight)
+    VALUES (1, 1, 'a', 4), (1, 2, 'b', 6), (2, 1, 'c', 10);
+INSERT INTO technical_attempts (user_id, question_id, selected_answer, correct_answer, response_time, is_correct,
+                                attempt_number)
+    VALUES (1, 1, 'a', 'a', 3.0, 1, 1), (1, 2, 'b', 'a', 5.0, 0, 2), (2, 1, 'a', 'a', 7.5, 1, 1);
+INSERT INTO courses (id, title, difficulty) VALUES (1, 'Course', 'Beginner');
+INSERT INTO quizzes (id, course_id, title) VALUES (1, 1, 'Quiz');
+INSERT INTO questions (id, quiz_id, text, options, correct_answer)
+    VALUES (1, 1, 'Pick one', 'Alpha, Beta ,Gamma', 'Beta');
+"""
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    raw = engine.raw_connection()
+    try:
+        raw.executescript(BASELINE_SCHEMA)
+    finally:
+        raw.close()
+    yield engine
+    engine.dispose()
+
+def test_upgrade_builds_aggregates_for_existing_history(baseline_engine):
+    migrations.upgrade(baseline_engine)
+    with Session(baseline_engine) as db:
+        stored = {a.user_id: a for a in db.query(models.ProfileAggregate)}
+        assert set(stored) == {1, 2}  # user 3 has no history
+        assert (stored[1].behavioral_count, stored[1].technical_count, stored[1].correct_count) == (2, 2, 1)
+        assert stored[1].response_time_sum == 8.0
+        assert profile_aggregates.rebuild(db, check_only=True) == 0
+
+def test_upgrade_baseline_database(baseline_engine):
+    applied = migrations.upgrade(baseline_engine)
+    assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+    with baseline_engine.connect() as conn:
+        assert migrations.applied_versions(conn) == set(applied)
+        names = dict(conn.execute(migrations.schema_migrations.select().with_only_columns(
+            migrations.schema_migrations.c.version, migrations.schema_migrations.c.name)).all())
+    assert names == {version: name for version, name, _ in migrations.MIGRATIONS}
+
+    inspector = inspect(baseline_engine)
+    indexes = {table: {ix["name"] for ix in inspector.get_indexes(table)}
+               for table in ("behavioral_responses", "technical_attempts", "courses")}
+    assert {"ix_behavioral_responses_user_id_id", "ix_behavioral_responses_created_at"} <= indexes["behavioral_responses"]
+    assert {"ix_technical_attempts_user_id_id", "ix_technical_attempts_created_at"} <= indexes["technical_attempts"]
+    assert "ix_courses_difficulty_id" in indexes["courses"]
+
+    with Session(baseline_engine) as db:
+        assert db.get(models.Question, 1).choices == ["Alpha", "Beta", "Gamma"]
+        assert db.query(models.BehavioralResponse).filter(models.BehavioralResponse.created_at.is_(None)).count() == 0
+        assert db.query(models.TechnicalAttempt).filter(models.TechnicalAttempt.created_at.is_(None)).count() == 0
+
+def test_upgrade_is_idempotent(baseline_engine):
+    migrations.upgrade(baseline_engine)
+    assert migrations.upgrade(baseline_engine) == []
+
+def test_fresh_database_needs_no_backfill(engine):
+    # create_all already built the final schema; the steps must all be no-ops
+    assert migrations.upgrade(engine) == [version for version, _, _ in migrations.MIGRATIONS]
+    with Session(engine) as db:
+        assert db.query(models.ProfileAggregate).count() == 0
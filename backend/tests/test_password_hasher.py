@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import auth
+
+@pytest.fixture
+def hasher():
+    hasher = auth.PasswordHasher(executor="thread", workers=1, max_queue=1, timeout=0.05)
+    yield hasher
+    if hasher._executor is not None:
+        hasher._executor.shutdown(wait=True)
+
+def _slow(release: threading.Event):
+    def slow_hash(password: str) -> str:
+        release.wait(5)
+        return f"hashed-{password}"
+    return slow_hash
+
+def _assert_busy(call):
+    with pytest.raises(HTTPException) as raised:
+        call()
+    assert raised.value.status_code == 503
+
+def test_timed_out_hash_keeps_its_slot(hasher):
+    release = threading.Event()
+    slow_hash = _slow(release)
+    try:
+        # Times out, but keeps running on the only worker
+        _assert_busy(lambda: hasher._submit("hash", slow_hash, "a"))
+        assert hasher.stats()["in_flight"] == 1
+        queued = hasher._start(slow_hash, "b")  # takes the one queue slot
+        # Running + queued = workers + max_queue: the next call is rejected
+        rejected = hasher.rejected
+        _assert_busy(lambda: hasher._submit("hash", slow_hash, "c"))
+        assert hasher.rejected == rejected + 1
+    finally:
+        release.set()
+    assert queued.result(timeout=5)[0] == "hashed-b"
+    deadline = time.monotonic() + 5
+    while hasher.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert hasher.stats()["in_flight"] == 0
+    assert hasher._submit("hash", str.upper, "d") == "D"
+
+def test_timed_out_async_hash_keeps_its_slot(hasher):
+    release = threading.Event()
+    slow_hash = _slow(release)
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await hasher._submit_async("hash", slow_hash, "a")
+        hasher._start(slow_hash, "b")
+        with pytest.raises(HTTPException) as raised:
+            await hasher._submit_async("hash", slow_hash, "c")
+        return raised.value.status_code
+
+    try:
+        rejected = hasher.rejected
+        assert asyncio.run(scenario()) == 503
+        assert hasher.rejected == rejected + 2  # a timed out, c found no slot
+        assert hasher.stats()["in_flight"] == 2  # a still running, b queued
+    finally:
+        release.set()
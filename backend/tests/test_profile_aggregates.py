@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Session
+
+from app import models, profile_aggregates
+
+def race_before_savepoint(db: Session, monkeypatch, create):
+    """Run ``create()`` (another session's commit) just before ``db`` opens its next savepoint."""
+    begin_nested = db.begin_nested
+
+    def racing():
+        create()
+        return begin_nested()
+
+    monkeypatch.setattr(db, "begin_nested", racing)
+
+def test_built_aggregate_rolls_back_with_its_transaction(engine, user_id):
+    with Session(engine) as db:
+        aggregate = profile_aggregates.get_aggregate(db, user_id)
+        assert aggregate.technical_count == 1
+        db.rollback()
+    with Session(engine) as db:
+        assert db.query(models.ProfileAggregate).count() == 0
+
+def test_concurrently_built_aggregate_is_reused(engine, user_id, monkeypatch):
+    def create():
+        with Session(engine) as other:
+            other.add(models.ProfileAggregate(user_id=user_id, version=7, profile_version=0,
+                                              **dict(profile_aggregates._empty(), technical_count=1)))
+            other.commit()
+
+    with Session(engine) as db:
+        race_before_savepoint(db, monkeypatch, create)
+        aggregate = profile_aggregates.get_aggregate(db, user_id)
+        assert aggregate.version == 7
+        db.commit()
+    with Session(engine) as db:
+        assert db.query(models.ProfileAggregate).count() == 1
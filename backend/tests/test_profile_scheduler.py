@@ -0,0 +1,34 @@
+from app.profile_scheduler import ProfileRecomputeScheduler
+
+def _flaky(failures: int):
+    calls = []
+
+    def recompute(user_id: int):
+        calls.append(user_id)
+        if len(calls) <= failures:
+            raise RuntimeError("database is locked")
+
+    return recompute, calls
+
+def test_failed_recompute_is_retried():
+    recompute, calls = _flaky(failures=2)
+    scheduler = ProfileRecomputeScheduler(recompute, window=0.0, max_retries=3, retry_backoff=0.01)
+    scheduler.schedule(7)
+    assert scheduler.flush(timeout=5)
+    scheduler.shutdown()
+
+    assert calls == [7, 7, 7]
+    stats = scheduler.stats()
+    assert (stats["completed"], stats["failed"], stats["retried"], stats["abandoned"]) == (1, 2, 2, 0)
+
+def test_retries_are_bounded():
+    recompute, calls = _flaky(failures=100)
+    scheduler = ProfileRecomputeScheduler(recompute, window=0.0, max_retries=2, retry_backoff=0.01)
+    scheduler.schedule(7)
+    assert scheduler.flush(timeout=5)
+    scheduler.shutdown()
+
+    assert len(calls) == 3
+    stats = scheduler.stats()
+    assert (stats["completed"], stats["failed"], stats["retried"], stats["abandoned"]) == (0, 3, 2, 1)
+    assert not scheduler.is_pending(7)
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app import models
+from app.routes.recommendation_routes import update_cognitive_profile
+
+from conftest import FailingCommitSession
+
+def miss_first_lookup(db: Session, monkeypatch, model):
+    """Make ``db``'s first query for ``model`` find nothing, as if the row was committed right after it."""
+    query = db.query
+
+    def lookup(*entities, **kwargs):
+        q = query(*entities, **kwargs)
+        if len(entities) == 1 and entities[0] is model and not getattr(db, "_missed", False):
+            db._missed = True
+            q.__dict__["first"] = lambda: None  # Query copies __dict__ into filtered queries
+        return q
+
+    monkeypatch.setattr(db, "query", lookup)
+
+def test_failed_profile_update_leaves_no_rows(engine, user_id):
+    with FailingCommitSession(engine) as db:
+        with pytest.raises(RuntimeError):
+            update_cognitive_profile(user_id, db)
+        db.rollback()
+    with Session(engine) as db:
+        assert db.query(models.ProfileAggregate).count() == 0
+        assert db.query(models.CognitiveProfile).count() == 0
+
+def test_concurrently_created_profile_is_overwritten(engine, user_id, monkeypatch):
+    with Session(engine) as other:
+        other.add(models.CognitiveProfile(user_id=user_id, cognitive_level="stale", behavioral_score=0,
+                                          technical_score=0, learning_style="Visual", recommended_strategy=""))
+        other.commit()
+
+    with Session(engine) as db:
+        miss_first_lookup(db, monkeypatch, models.CognitiveProfile)
+        update_cognitive_profile(user_id, db)
+    with Session(engine) as db:
+        profiles = db.query(models.CognitiveProfile).all()
+        assert len(profiles) == 1
+        assert profiles[0].cognitive_level != "stale"
+        assert profiles[0].technical_score == 100
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+
+from app import database, models, profile_aggregates, rollups
+
+OLD_DAY = datetime(2026, 1, 1, 10, 30)
+
+def _backdate(user_id: int, model, count: int):
+    """Move the user's ``count`` oldest raw rows of ``model`` to OLD_DAY."""
+    with database.SessionLocal() as db:
+        rows = db.query(model).filter(model.user_id == user_id).order_by(model.id).limit(count).all()
+        for row in rows:
+            row.created_at = OLD_DAY
+        db.commit()
+
+def _compact(user_id: int):
+    with database.SessionLocal() as db:
+        return rollups.compact(db, rollups.cutoff_for(30), (user_id, user_id + 1))
+
+def _state(client, headers, user_id: int):
+    body = client.get("/analytics/performance", headers=headers).json()
+    with database.SessionLocal() as db:
+        scanned = profile_aggregates.scan_aggregates(db, [user_id])[user_id]
+        raw = (db.query(models.BehavioralResponse).filter(models.BehavioralResponse.user_id == user_id).count(),
+               db.query(models.TechnicalAttempt).filter(models.TechnicalAttempt.user_id == user_id).count())
+    return (body["total_attempts"], body["total_behavioral_responses"]), scanned, raw
+
+def test_compaction_keeps_totals_and_merges_repeated_runs(client, headers):
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    attempts = {"attempts": [{"question_id": i, "selected_answer": "a", "correct_answer": "a" if ok else "b",
+                              "response_time": float(i), "is_correct": ok, "attempt_number": 1}
+                             for i, ok in enumerate([True, False, True, True, False, True], start=1)]}
+    assert client.post("/tests/technical/batch", json=attempts, headers=headers).status_code == 200
+    behavioral = {"responses": [{"question_id": i, "selected_option": "a", "score_weight": i} for i in (1, 2, 3)]}
+    assert client.post("/tests/behavioral/batch", json=behavioral, headers=headers).status_code == 200
+    totals, scanned, raw = _state(client, headers, user_id)
+    assert totals == (6, 3)
+    assert raw == (3, 6)
+
+    _backdate(user_id, models.TechnicalAttempt, 4)
+    _backdate(user_id, models.BehavioralResponse, 1)
+    assert _compact(user_id) == (1, 4)
+    assert _state(client, headers, user_id) == (totals, scanned, (2, 2))
+
+    # Rows arriving late for an already compacted day add to its rollup row
+    _backdate(user_id, models.TechnicalAttempt, 1)
+    _backdate(user_id, models.BehavioralResponse, 2)
+    assert _compact(user_id) == (2, 1)
+    assert _state(client, headers, user_id) == (totals, scanned, (0, 1))
+    # Nothing left before the cutoff: a further run is a no-op
+    assert _compact(user_id) == (0, 0)
+    assert _state(client, headers, user_id) == (totals, scanned, (0, 1))
+
+    with database.SessionLocal() as db:
+        rollup = db.query(models.DailyRollup).filter(models.DailyRollup.user_id == user_id).one()
+        assert rollup.day == date(2026, 1, 1)
+        assert (rollup.technical_count, rollup.correct_count) == (5, 3)
+        assert (rollup.behavioral_count, rollup.behavioral_weight_sum) == (3, 6.0)
+        assert rollup.response_time_sum == sum(range(1, 6))
+        # The maintained aggregate was never touched and still matches a full rescan
+        aggregate = db.get(models.ProfileAggregate, user_id)
+        assert {field: getattr(aggregate, field) for field in profile_aggregates.FIELDS} == scanned
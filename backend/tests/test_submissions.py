@@ -0,0 +1,85 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from app import database, models, profile_aggregates
+from app.routes import recommendation_routes
+from app.routes.test_routes import MAX_BATCH_SIZE
+
+def _behavioral(n: int) -> dict:
+    return {"responses": [{"question_id": i % 10 + 1, "selected_option": "abcd"[i % 4], "score_weight": i % 10 + 1}
+                          for i in range(n)]}
+
+def _technical(n: int) -> dict:
+    return {"attempts": [{"question_id": i + 1, "selected_answer": "a", "correct_answer": "a" if i % 2 else "b",
+                          "response_time": 2.0 + i, "is_correct": bool(i % 2), "attempt_number": 1}
+                         for i in range(n)]}
+
+def _user_id(client, headers) -> int:
+    return client.get("/auth/me", headers=headers).json()["id"]
+
+def _count(model, user_id: int) -> int:
+    with database.SessionLocal() as db:
+        return db.query(model).filter(model.user_id == user_id).count()
+
+@contextlib.contextmanager
+def _commits():
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    engines = [database.engine] + ([database.async_engine.sync_engine] if database.async_engine is not None else [])
+    for engine in engines:
+        event.listen(engine, "commit", on_commit)
+    try:
+        yield commits
+    finally:
+        for engine in engines:
+            event.remove(engine, "commit", on_commit)
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    """User ids handed to the profile scheduler, which is kept from running."""
+    calls = []
+    monkeypatch.setattr(recommendation_routes.profile_scheduler, "schedule", calls.append)
+    return calls
+
+@pytest.mark.parametrize("path, body, model", [
+    ("/tests/behavioral/batch", _behavioral(12), models.BehavioralResponse),
+    ("/tests/technical/batch", _technical(12), models.TechnicalAttempt),
+])
+def test_batch_is_one_commit_and_one_recompute(client, headers, scheduled, path, body, model):
+    user_id = _user_id(client, headers)
+    with _commits() as commits:
+        response = client.post(path, json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 12
+    assert len(commits) == 1
+    assert scheduled == [user_id]
+    assert _count(model, user_id) == 12
+
+def test_failed_batch_stores_nothing(client, headers, scheduled, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("aggregate update failed")
+
+    monkeypatch.setattr(profile_aggregates, "apply_deltas", fail)
+    with pytest.raises(RuntimeError):
+        client.post("/tests/technical/batch", json=_technical(5), headers=headers)
+    assert _count(models.TechnicalAttempt, _user_id(client, headers)) == 0
+    assert scheduled == []
+
+def test_batch_size_limits(client, headers, scheduled):
+    response = client.post("/tests/behavioral/batch", json=_behavioral(MAX_BATCH_SIZE + 1), headers=headers)
+    assert response.status_code == 422
+    assert client.post("/tests/technical/batch", json={"attempts": []}, headers=headers).status_code == 400
+    assert client.post("/tests/behavioral/batch", json=_behavioral(MAX_BATCH_SIZE), headers=headers).status_code == 200
+    assert _count(models.BehavioralResponse, _user_id(client, headers)) == MAX_BATCH_SIZE
+
+def test_batch_updates_aggregate_once(client, headers):
+    user_id = _user_id(client, headers)
+    client.post("/tests/technical/batch", json=_technical(4), headers=headers)
+    with database.SessionLocal() as db:
+        aggregate = db.query(models.ProfileAggregate).filter(models.ProfileAggregate.user_id == user_id).one()
+        assert (aggregate.technical_count, aggregate.correct_count) == (4, 2)
@@ -6,6 +6,7 @@ const QuizComponent = ({ quiz, onComplete }) => {
     const [selectedOption, setSelectedOption] = useState(null);
     const [showFeedback, setShowFeedback] = useState(false);
     const [score, setScore] = useState(0);
+    const [answers, setAnswers] = useState([]);
     const [isFinished, setIsFinished] = useState(false);
 
     if (!quiz || !quiz.questions || quiz.questions.length === 0) {
@@ -18,7 +19,7 @@ const QuizComponent = ({ quiz, onComplete }) => {
     }
 
     const currentQuestion = quiz.questions[currentQuestionIndex];
-    const options = currentQuestion.options.split(',');
+    const options = currentQuestion.choices?.length ? currentQuestion.choices : currentQuestion.options.split(',');
 
     const handleOptionSelect = (option) => {
         if (showFeedback) return;
@@ -30,6 +31,7 @@ const QuizComponent = ({ quiz, onComplete }) => {
 
         const isCorrect = selectedOption === currentQuestion.correct_answer;
         if (isCorrect) setScore(score + 1);
+        setAnswers([...answers, { question_id: currentQuestion.id, selected_answer: selectedOption }]);
         setShowFeedback(true);
     };
 
@@ -40,7 +42,8 @@ const QuizComponent = ({ quiz, onComplete }) => {
             setShowFeedback(false);
         } else {
             setIsFinished(true);
-            if (onComplete) onComplete(score + (selectedOption === currentQuestion.correct_answer ? 1 : 0));
+            // score already includes the last answer (counted when it was selected)
+            if (onComplete) onComplete(score, answers);
         }
     };
 
@@ -76,6 +79,7 @@ const QuizComponent = ({ quiz, onComplete }) => {
                         setSelectedOption(null);
                         setShowFeedback(false);
                         setScore(0);
+                        setAnswers([]);
                         setIsFinished(false);
                     }}
                     className="text-primary-600 font-bold hover:underline"
@@ -135,15 +135,13 @@ const BehavioralTest = () => {
     const submitTest = async () => {
         setIsSubmitting(true);
         try {
-            const submissionPromises = Object.keys(answers).map(qId => {
-                return api.post('/tests/behavioral', {
-                    question_id: parseInt(qId),
-                    selected_option: answers[qId].selected_option,
-                    score_weight: answers[qId].score_weight
-                });
-            });
+            const responses = Object.keys(answers).map(qId => ({
+                question_id: parseInt(qId),
+                selected_option: answers[qId].selected_option,
+                score_weight: answers[qId].score_weight
+            }));
 
-            await Promise.all(submissionPromises);
+            await api.post('/tests/behavioral/batch', { responses });
             setIsCompleted(true);
         } catch (error) {
             console.error("Error submitting test", error);
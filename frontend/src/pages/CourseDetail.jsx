@@ -39,6 +39,16 @@ const CourseDetail = () => {
         fetchCourse();
     }, [id]);
 
+    const handleQuizComplete = async (score, answers) => {
+        try {
+            // Graded again on the server, which records the completion with its own score;
+            // completed courses are left out of future recommendations
+            await api.post(`/courses/${id}/quiz/grade`, { answers, complete: true });
+        } catch (error) {
+            console.error("Failed to record course completion", error);
+        }
+    };
+
     if (loading) {
         return (
             <div className="min-h-screen bg-slate-50 flex flex-col">
@@ -188,7 +198,7 @@ const CourseDetail = () => {
                     <div className="lg:col-span-2">
                         {showQuiz ? (
                             <div className="bg-white rounded-3xl shadow-sm border border-slate-200 overflow-hidden min-h-[500px]">
-                                <QuizComponent quiz={course.quiz} />
+                                <QuizComponent quiz={course.quiz} onComplete={handleQuizComplete} />
                             </div>
                         ) : activeModule ? (
                             <div className="bg-white rounded-3xl shadow-sm border border-slate-200 overflow-hidden flex flex-col min-h-[500px]">
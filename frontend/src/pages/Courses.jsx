@@ -15,7 +15,7 @@ const Courses = () => {
         const fetchData = async () => {
             try {
                 const [coursesRes, profileRes] = await Promise.all([
-                    api.get('/courses/'),
+                    api.get('/courses/', { params: { fields: 'summary' } }),
                     api.get('/recommendations/profile')
                 ]);
                 setCourses(coursesRes.data);
@@ -136,13 +136,8 @@ const TechnicalTest = () => {
     const submitTest = async () => {
         setIsSubmitting(true);
         try {
-            // Backend expects one attempt per post. 
-            // We will batch send the results array.
-            const submissionPromises = results.map(attempt => {
-                return api.post('/tests/technical', attempt);
-            });
-
-            await Promise.all(submissionPromises);
+            // Send every attempt (including retries) in a single request
+            await api.post('/tests/technical/batch', { attempts: results });
             setIsCompleted(true);
         } catch (error) {
             console.error("Error submitting technical test", error);